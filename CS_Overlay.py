@@ -1,5 +1,6 @@
 import ctypes
 import ctypes.wintypes as wintypes
+import functools
 import json
 import logging
 import os
@@ -7,7 +8,18 @@ import sys
 import threading
 import time
 
-from Stats import CSOCR, gettime
+from gameclock import DEFAULT_SYNC_INTERVAL, RECHECK_INTERVAL, ClockPoller, GameClock
+from recorder import FrameRecorder
+from Stats import (
+    CSOCR,
+    DEFAULT_GLYPH_CACHE_SIZE,
+    DEFAULT_REQUEST_TIMEOUTS,
+    OCR_MATCHERS,
+    RequestTimeouts,
+    close_winhttp_handles,
+    fetch_game_time,
+)
+from win32 import WINFUNCTYPE, gdi32, kernel32, last_error, shell32, user32
 
 
 try:
@@ -32,11 +44,6 @@ log_dir = runtime_dir if os.access(runtime_dir, os.W_OK) else fallback_log_dir
 log_path = os.path.join(log_dir, "cs_overlay.log")
 
 
-user32 = ctypes.windll.user32
-gdi32 = ctypes.windll.gdi32
-shell32 = ctypes.windll.shell32
-kernel32 = ctypes.windll.kernel32
-
 if not hasattr(wintypes, "LRESULT"):
     wintypes.LRESULT = (
         ctypes.c_longlong if ctypes.sizeof(ctypes.c_void_p) == 8 else ctypes.c_long
@@ -45,6 +52,8 @@ if not hasattr(wintypes, "UINT_PTR"):
     wintypes.UINT_PTR = (
         ctypes.c_ulonglong if ctypes.sizeof(ctypes.c_void_p) == 8 else ctypes.c_uint
     )
+if not hasattr(wintypes, "HCURSOR"):
+    wintypes.HCURSOR = wintypes.HICON
 
 user32.CreateWindowExW.restype = wintypes.HWND
 user32.CreateWindowExW.argtypes = [
@@ -187,6 +196,8 @@ COLOR_BTNFACE = 15
 
 MIN_TIMER_MS = 50
 MAX_TIMER_MS = 60000
+# GameClock never syncs more often than this, so shorter settings are raised.
+MIN_CLOCK_SYNC_MS = int(RECHECK_INTERVAL * 1000)
 
 WS_CHILD = 0x40000000
 WS_BORDER = 0x00800000
@@ -264,11 +275,11 @@ class LOGFONTW(ctypes.Structure):
     ]
 
 
-WNDPROC = ctypes.WINFUNCTYPE(
+WNDPROC = WINFUNCTYPE(
     wintypes.LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM
 )
 
-WINEVENTPROC = ctypes.WINFUNCTYPE(
+WINEVENTPROC = WINFUNCTYPE(
     None,
     wintypes.HANDLE,
     wintypes.DWORD,
@@ -728,6 +739,8 @@ def update_focus_state(is_focused):
     if is_focused != league_focused:
         league_focused = is_focused
         logger.info("League focus changed focused=%s", is_focused)
+        if overlay_instance and overlay_instance.clock_poller:
+            overlay_instance.clock_poller.set_active(is_focused)
         if overlay_instance and overlay_instance.hwnd:
             user32.PostMessageW(
                 overlay_instance.hwnd, WM_FOCUS_CHANGED, 1 if is_focused else 0, 0
@@ -805,6 +818,11 @@ class OverlayWindow:
         self.tray_icon = None
         self.tray_nid = None
         self.ocr = None
+        self.clock_sync_interval_ms = int(DEFAULT_SYNC_INTERVAL * 1000)
+        self.clock_timeouts = DEFAULT_REQUEST_TIMEOUTS
+        self.game_clock = GameClock(fetch_game_time)
+        self.clock_poller = None
+        self.recorder = None
         self.last_paint_monotonic = 0.0
         self.last_show_monotonic = 0.0
         self.last_show_reason = "startup"
@@ -946,7 +964,7 @@ class OverlayWindow:
         )
         if not self.hwnd:
             logger.error("CreateWindowExW failed last_error=%s", format_last_error())
-            raise ctypes.WinError()
+            raise last_error()
         log_window_event("Overlay window created", self.hwnd)
         self.refresh_metrics()
         self.update_layout()
@@ -1091,6 +1109,11 @@ class OverlayWindow:
     def hide(self):
         self.last_hide_reason = "hide"
         user32.KillTimer(self.hwnd, TIMER_POST_SHOW_CHECK)
+        if self.ocr:
+            self.ocr.log_stats("hide")
+        self.game_clock.log_stats("hide")
+        if self.recorder:
+            self.recorder.flush()
         if not self.force_visible:
             self.visible = False
             kernel32.SetLastError(0)
@@ -1106,10 +1129,17 @@ class OverlayWindow:
         if not self.ocr:
             return
         cs_value = self.ocr.get_cs()
-        current_time = gettime() if league_focused else 1
+        current_time = self.game_clock.minutes() if league_focused else 1
         minutes = int(current_time)
         seconds = int((current_time % 1) * 60)
         cs_per_min = cs_value / current_time if current_time > 0 else 0
+        if self.recorder and self.ocr.last_frame is not None:
+            self.recorder.record(
+                self.ocr.geometry,
+                self.ocr.last_frame,
+                self.game_clock.read(),
+                cs_value,
+            )
 
         if self.custom_format:
             try:
@@ -1152,6 +1182,8 @@ class OverlayWindow:
 
     def handle_system_change(self, reason):
         logger.info("System change received reason=%s", reason)
+        if self.ocr and reason in ("WM_DISPLAYCHANGE", "WM_DPICHANGED"):
+            self.ocr.invalidate_geometry()
         self.refresh_metrics()
         self.update_font()
         if self.visible or self.force_visible:
@@ -1683,6 +1715,14 @@ def load_config():
             "font_size": 10,
             "update_interval_ms": 500,
             "focus_poll_interval_ms": 1000,
+            "glyph_cache_size": DEFAULT_GLYPH_CACHE_SIZE,
+            "native_templates": False,
+            "record_frames": False,
+            "ocr_matcher": "ssd",
+            "clock_sync_interval_ms": int(DEFAULT_SYNC_INTERVAL * 1000),
+            "clock_connect_timeout_ms": DEFAULT_REQUEST_TIMEOUTS.connect_ms,
+            "clock_send_timeout_ms": DEFAULT_REQUEST_TIMEOUTS.send_ms,
+            "clock_receive_timeout_ms": DEFAULT_REQUEST_TIMEOUTS.receive_ms,
         }
 
 
@@ -1699,10 +1739,37 @@ def main():
     global overlay_instance
     overlay_instance = OverlayWindow()
     overlay_instance.create_window()
-    overlay_instance.ocr = CSOCR()
-    logger.info("Overlay OCR initialized")
 
     config = load_config()
+    matcher = config.get("ocr_matcher", "ssd")
+    if matcher not in OCR_MATCHERS:
+        logger.warning("Unknown ocr_matcher=%r, using ssd", matcher)
+        matcher = "ssd"
+    overlay_instance.ocr = CSOCR(
+        glyph_cache_size=config.get("glyph_cache_size", DEFAULT_GLYPH_CACHE_SIZE),
+        native_templates=bool(config.get("native_templates", False)),
+        template_cache_dir=log_dir,
+        glyph_dir=os.path.join(base_path, "chars"),
+        matcher=matcher,
+    )
+    logger.info(
+        "Overlay OCR initialized glyph_cache_size=%s native_templates=%s matcher=%s",
+        overlay_instance.ocr.glyph_cache.maxsize,
+        overlay_instance.ocr.native_templates,
+        overlay_instance.ocr.matcher,
+    )
+    if config.get("record_frames", False):
+        record_path = os.path.join(
+            log_dir, time.strftime("frames-%Y%m%d-%H%M%S.csfr")
+        )
+        try:
+            overlay_instance.recorder = FrameRecorder(record_path)
+            logger.info("Frame recording enabled path=%s", record_path)
+        except OSError as exc:
+            logger.warning(
+                "Frame recording unavailable path=%s error=%s", record_path, exc
+            )
+
     overlay_instance.x = parse_float_setting(config.get("x"), overlay_instance.x)
     overlay_instance.y = parse_float_setting(config.get("y"), overlay_instance.y)
     overlay_instance.custom_format = config.get(
@@ -1721,6 +1788,34 @@ def main():
     overlay_instance.focus_poll_interval_ms = max(
         MIN_TIMER_MS, min(MAX_TIMER_MS, overlay_instance.focus_poll_interval_ms)
     )
+    overlay_instance.clock_sync_interval_ms = max(
+        MIN_CLOCK_SYNC_MS,
+        min(
+            MAX_TIMER_MS,
+            config.get("clock_sync_interval_ms", overlay_instance.clock_sync_interval_ms),
+        ),
+    )
+    overlay_instance.clock_timeouts = RequestTimeouts(
+        *(
+            max(MIN_TIMER_MS, min(MAX_TIMER_MS, config.get(f"clock_{name}", default)))
+            for name, default in zip(
+                ("connect_timeout_ms", "send_timeout_ms", "receive_timeout_ms"),
+                DEFAULT_REQUEST_TIMEOUTS,
+            )
+        )
+    )
+    # The game clock is polled on its own thread so a slow Live Client Data
+    # endpoint never holds up WM_TIMER, painting or the tray.
+    overlay_instance.game_clock = GameClock(
+        functools.partial(fetch_game_time, overlay_instance.clock_timeouts),
+        sync_interval=overlay_instance.clock_sync_interval_ms / 1000,
+    )
+    # The poller closes the pooled WinHTTP handles itself when it stops, so
+    # they are never closed under a request still in flight.
+    overlay_instance.clock_poller = ClockPoller(
+        overlay_instance.game_clock, on_stop=close_winhttp_handles
+    )
+    overlay_instance.clock_poller.start()
     overlay_instance.update_position()
     overlay_instance.update_font()
 
@@ -1729,9 +1824,12 @@ def main():
 
     overlay_instance.apply_timers()
     logger.info(
-        "Timers applied update_interval_ms=%s focus_poll_interval_ms=%s",
+        "Timers applied update_interval_ms=%s focus_poll_interval_ms=%s "
+        "clock_sync_interval_ms=%s clock_timeouts=%s",
         overlay_instance.update_interval_ms,
         overlay_instance.focus_poll_interval_ms,
+        overlay_instance.clock_sync_interval_ms,
+        overlay_instance.clock_timeouts,
     )
 
     t = threading.Thread(target=detection_thread, daemon=True, name="focus-detection")
@@ -1739,6 +1837,7 @@ def main():
     logger.info("Focus detection thread started")
 
     check_league_focus()
+    overlay_instance.clock_poller.set_active(league_focused)
 
     msg = wintypes.MSG()
     result = user32.GetMessageW(ctypes.byref(msg), 0, 0, 0)
@@ -1748,6 +1847,21 @@ def main():
         result = user32.GetMessageW(ctypes.byref(msg), 0, 0, 0)
     if result == -1:
         logger.error("Main loop GetMessageW failed last_error=%s", format_last_error())
+    overlay_instance.ocr.log_stats("exit")
+    # Long enough for a request that has just gone out to run into its
+    # deadlines, with some slack for the thread to wind down.
+    overlay_instance.clock_poller.stop(
+        timeout=sum(overlay_instance.clock_timeouts) / 1000 + 0.5
+    )
+    overlay_instance.game_clock.log_stats("exit")
+    overlay_instance.ocr.close()
+    if overlay_instance.recorder:
+        overlay_instance.recorder.close()
+        logger.info(
+            "Frame recording closed records=%s bytes=%s",
+            overlay_instance.recorder.records,
+            overlay_instance.recorder.bytes_written,
+        )
     release_single_instance()
 
     config = {
@@ -1757,6 +1871,14 @@ def main():
         "font_size": overlay_instance.font_size,
         "update_interval_ms": overlay_instance.update_interval_ms,
         "focus_poll_interval_ms": overlay_instance.focus_poll_interval_ms,
+        "clock_sync_interval_ms": overlay_instance.clock_sync_interval_ms,
+        "clock_connect_timeout_ms": overlay_instance.clock_timeouts.connect_ms,
+        "clock_send_timeout_ms": overlay_instance.clock_timeouts.send_ms,
+        "clock_receive_timeout_ms": overlay_instance.clock_timeouts.receive_ms,
+        "glyph_cache_size": overlay_instance.ocr.glyph_cache.maxsize,
+        "native_templates": overlay_instance.ocr.native_templates,
+        "record_frames": bool(config.get("record_frames", False)),
+        "ocr_matcher": overlay_instance.ocr.matcher,
     }
     save_config(config)
 
@@ -11,7 +11,7 @@ a = Analysis(
         ('C:/Users/Andrew/miniforge3/envs/overlay/Library/bin/libmpdec-4.dll', '.'),
         ('C:/Users/Andrew/miniforge3/envs/overlay/Library/bin/zstd.dll', '.'),
     ],
-    datas=[('draw.ico', '.')],
+    datas=[('draw.ico', '.'), ('digits.bin', '.'), ('chars', 'chars')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
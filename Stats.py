@@ -1,14 +1,29 @@
 import ctypes
 import ctypes.wintypes as wintypes
+import hashlib
 import json
 import logging
+from typing import NamedTuple
 
-from digits import TARGET_DIGITS
-
+from digits import TEMPLATES
+from gameclock import DeadlineExceeded
+from geometry import (
+    BASE_DIGIT_HEIGHT,
+    BASE_DIGIT_WIDTH,
+    SCALED_NON_LEADING_OFFSETS,
+    compute_capture_geometry,
+)
+from imaging import LazyGrayRegion, ResamplePlan, bgra_to_gray, load_numpy
+from templates import (
+    BLANK_TEMPLATE,
+    DEFAULT_GLYPH_DIR,
+    GlyphCache,
+    TemplateBank,
+    build_native_bank,
+    load_glyph_templates,
+)
+from win32 import gdi32, kernel32, last_error, user32, winhttp
 
-user32 = ctypes.windll.user32
-gdi32 = ctypes.windll.gdi32
-winhttp = ctypes.windll.winhttp
 
 logger = logging.getLogger("cs_overlay")
 
@@ -23,6 +38,18 @@ WINHTTP_NO_REFERER = None
 WINHTTP_DEFAULT_ACCEPT_TYPES = ctypes.POINTER(wintypes.LPCWSTR)()
 WINHTTP_FLAG_SECURE = 0x00800000
 WINHTTP_OPTION_SECURITY_FLAGS = 31
+# The API is on 127.0.0.1, so there is no name to resolve.
+WINHTTP_RESOLVE_TIMEOUT_MS = 0
+ERROR_WINHTTP_TIMEOUT = 12002
+
+# A gamestats response is a couple of hundred bytes; the buffer grows if one
+# is ever larger.
+RECEIVE_BUFFER_SIZE = 4096
+GAME_TIME_KEY = b'"gameTime":'
+# How far into the body the fast path looks for the key, and how many bytes
+# it allows for the number, before leaving the payload to json.loads.
+GAME_TIME_SCAN_LIMIT = 512
+GAME_TIME_MAX_DIGITS = 32
 
 SECURITY_FLAG_IGNORE_UNKNOWN_CA = 0x00000100
 SECURITY_FLAG_IGNORE_CERT_WRONG_USAGE = 0x00000200
@@ -40,18 +67,38 @@ logger = logging.getLogger("cs_overlay")
 
 _winhttp_session = None
 _winhttp_connection = None
+# Reused for every response; only the clock poller thread reads into it.
+_receive_buffer = bytearray(RECEIVE_BUFFER_SIZE)
+_receive_array = (ctypes.c_char * RECEIVE_BUFFER_SIZE).from_buffer(_receive_buffer)
+
+
+class RequestTimeouts(NamedTuple):
+    """WinHTTP deadlines for one Live Client Data request, in milliseconds.
+
+    The receive deadline applies to each read of the response separately.
+    """
+
+    connect_ms: int
+    send_ms: int
+    receive_ms: int
 
-BASE_SCREEN_HEIGHT = 1080
-BASE_CAPTURE_LEFT_OFFSET = 138
-BASE_CAPTURE_RIGHT_OFFSET = 108
-BASE_CAPTURE_TOP = 6
-BASE_CAPTURE_BOTTOM = 25
-BASE_DIGIT_TOP = 3
-BASE_DIGIT_WIDTH = 10
-BASE_DIGIT_HEIGHT = 12
-BASE_FIRST_DIGIT_SPACING = 9
-BASE_DIGIT_SPACING = 10
-SCALED_NON_LEADING_OFFSETS = (1, 2)
+
+DEFAULT_REQUEST_TIMEOUTS = RequestTimeouts(connect_ms=500, send_ms=500, receive_ms=1000)
+
+DEFAULT_GLYPH_CACHE_SIZE = 256
+# "ssd" matches slots on the sum of squared differences; "binary" on the
+# popcount of thresholded bits, with the SSD settling close calls.
+OCR_MATCHERS = ("ssd", "binary")
+# How far above the previous reading the predictive check looks.
+PREDICTED_CS_STEPS = 2
+# The remembered offset is trusted without trying the others when its average
+# MSE is below this fraction of the lowest MSE seen from a misaligned offset.
+OFFSET_MSE_MARGIN = 0.5
+# A losing offset that reads the same number within this factor of the
+# winner's MSE is a neighbouring column, not a misalignment.
+OFFSET_TIE_RATIO = 1.5
+# Offset searches with a misaligned loser to observe before trusting the gate.
+OFFSET_CALIBRATION_SAMPLES = 2
 
 
 class BITMAPINFOHEADER(ctypes.Structure):
@@ -80,8 +127,6 @@ user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
 user32.ReleaseDC.restype = ctypes.c_int
 gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
 gdi32.CreateCompatibleDC.restype = wintypes.HDC
-gdi32.CreateCompatibleBitmap.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int]
-gdi32.CreateCompatibleBitmap.restype = wintypes.HBITMAP
 gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
 gdi32.SelectObject.restype = wintypes.HGDIOBJ
 gdi32.BitBlt.argtypes = [
@@ -96,20 +141,21 @@ gdi32.BitBlt.argtypes = [
     wintypes.DWORD,
 ]
 gdi32.BitBlt.restype = wintypes.BOOL
-gdi32.GetDIBits.argtypes = [
-    wintypes.HDC,
-    wintypes.HBITMAP,
-    wintypes.UINT,
-    wintypes.UINT,
-    ctypes.c_void_p,
-    ctypes.POINTER(BITMAPINFO),
-    wintypes.UINT,
-]
-gdi32.GetDIBits.restype = ctypes.c_int
 gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
 gdi32.DeleteObject.restype = wintypes.BOOL
 gdi32.DeleteDC.argtypes = [wintypes.HDC]
 gdi32.DeleteDC.restype = wintypes.BOOL
+gdi32.CreateDIBSection.argtypes = [
+    wintypes.HDC,
+    ctypes.POINTER(BITMAPINFO),
+    wintypes.UINT,
+    ctypes.POINTER(ctypes.c_void_p),
+    wintypes.HANDLE,
+    wintypes.DWORD,
+]
+gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+gdi32.GdiFlush.argtypes = []
+gdi32.GdiFlush.restype = wintypes.BOOL
 
 winhttp.WinHttpOpen.argtypes = [
     wintypes.LPCWSTR,
@@ -143,6 +189,14 @@ winhttp.WinHttpSetOption.argtypes = [
     wintypes.DWORD,
 ]
 winhttp.WinHttpSetOption.restype = wintypes.BOOL
+winhttp.WinHttpSetTimeouts.argtypes = [
+    wintypes.HANDLE,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+]
+winhttp.WinHttpSetTimeouts.restype = wintypes.BOOL
 winhttp.WinHttpSendRequest.argtypes = [
     wintypes.HANDLE,
     wintypes.LPCWSTR,
@@ -169,204 +223,592 @@ winhttp.WinHttpReadData.argtypes = [
 winhttp.WinHttpReadData.restype = wintypes.BOOL
 winhttp.WinHttpCloseHandle.argtypes = [wintypes.HANDLE]
 winhttp.WinHttpCloseHandle.restype = wintypes.BOOL
+kernel32.GetLastError.restype = wintypes.DWORD
+
+
+def _top_down_bitmap_info(width, height):
+    bmi = BITMAPINFO()
+    bmi.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+    bmi.bmiHeader.biWidth = width
+    bmi.bmiHeader.biHeight = -height
+    bmi.bmiHeader.biPlanes = 1
+    bmi.bmiHeader.biBitCount = 32
+    bmi.bmiHeader.biCompression = BI_RGB
+    return bmi
+
+
+class CaptureSurface:
+    """Long-lived memory DC and 32-bit top-down DIB section for one ROI size.
+
+    ``capture`` blits the screen straight into the DIB and returns a memoryview
+    over its pixel bits, so no buffer is allocated or copied per frame. The view
+    is overwritten by the next capture and released by ``close``.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.hdc = None
+        self.hbmp = None
+        self.old_obj = None
+        self.pixels = None
+
+        bits = ctypes.c_void_p()
+        hdc_screen = user32.GetDC(None)
+        try:
+            self.hdc = gdi32.CreateCompatibleDC(hdc_screen)
+            bmi = _top_down_bitmap_info(width, height)
+            self.hbmp = gdi32.CreateDIBSection(
+                hdc_screen, ctypes.byref(bmi), DIB_RGB_COLORS, ctypes.byref(bits), None, 0
+            )
+        finally:
+            user32.ReleaseDC(None, hdc_screen)
+        if not self.hdc or not self.hbmp or not bits.value:
+            self.close()
+            raise last_error()
+
+        self.old_obj = gdi32.SelectObject(self.hdc, self.hbmp)
+        buffer = (ctypes.c_ubyte * (width * height * 4)).from_address(bits.value)
+        self.pixels = memoryview(buffer).cast("B")
+
+    def capture(self, left, top):
+        hdc_screen = user32.GetDC(None)
+        try:
+            gdi32.BitBlt(
+                self.hdc, 0, 0, self.width, self.height, hdc_screen, left, top, SRCCOPY
+            )
+        finally:
+            user32.ReleaseDC(None, hdc_screen)
+        gdi32.GdiFlush()
+        return self.pixels
+
+    def close(self):
+        self.pixels = None
+        if self.hdc and self.old_obj:
+            gdi32.SelectObject(self.hdc, self.old_obj)
+            self.old_obj = None
+        if self.hbmp:
+            gdi32.DeleteObject(self.hbmp)
+            self.hbmp = None
+        if self.hdc:
+            gdi32.DeleteDC(self.hdc)
+            self.hdc = None
 
 
 def capture_grayscale(left, top, width, height):
-    hdc_screen = user32.GetDC(None)
-    hdc_mem = gdi32.CreateCompatibleDC(hdc_screen)
-    hbmp = gdi32.CreateCompatibleBitmap(hdc_screen, width, height)
-    old_obj = gdi32.SelectObject(hdc_mem, hbmp)
-    buf_len = width * height * 4
-    buffer = (ctypes.c_ubyte * buf_len)()
+    """One-off luma capture for the notebooks in ``test files``.
+
+    ``CSOCR`` keeps a ``CaptureSurface`` across frames instead.
+    """
+    surface = CaptureSurface(width, height)
     try:
-        gdi32.BitBlt(hdc_mem, 0, 0, width, height, hdc_screen, left, top, SRCCOPY)
-
-        bmi = BITMAPINFO()
-        bmi.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
-        bmi.bmiHeader.biWidth = width
-        bmi.bmiHeader.biHeight = -height
-        bmi.bmiHeader.biPlanes = 1
-        bmi.bmiHeader.biBitCount = 32
-        bmi.bmiHeader.biCompression = BI_RGB
-
-        gdi32.GetDIBits(
-            hdc_mem, hbmp, 0, height, buffer, ctypes.byref(bmi), DIB_RGB_COLORS
-        )
+        return bgra_to_gray(surface.capture(left, top), width, height)
     finally:
-        gdi32.SelectObject(hdc_mem, old_obj)
-        gdi32.DeleteObject(hbmp)
-        gdi32.DeleteDC(hdc_mem)
-        user32.ReleaseDC(None, hdc_screen)
+        surface.close()
+
 
-    grayscale = []
-    for i in range(0, buf_len, 4):
-        b = buffer[i]
-        g = buffer[i + 1]
-        r = buffer[i + 2]
-        gray = (r * 299 + g * 587 + b * 114) // 1000
-        grayscale.append(gray)
-    return grayscale
+def _read_block(data, width, x, top, block_width, block_height):
+    if isinstance(data, LazyGrayRegion):
+        return data.block(x, top, block_width, block_height)
+    pixels = bytearray()
+    for row in range(block_height):
+        offset = (top + row) * width + x
+        pixels.extend(data[offset : offset + block_width])
+    return bytes(pixels)
 
 
 class CSOCR:
-    """Class to convert image captured from the game to text"""
+    """Class to convert image captured from the game to text
 
-    def __init__(self):
-        self.target_digits = TARGET_DIGITS
+    By default frames are captured from the screen. ``frame_source`` replaces
+    the capture with a callable that takes the ``CaptureGeometry`` and
+    returns a top-down BGRA buffer of ``capture_width`` x ``capture_height``
+    pixels; ``screen_size`` replaces the ``GetSystemMetrics`` lookup.
+    ``cascade`` matches single slots with ``TemplateBank.match_cascade``
+    instead of ``match``; both return the same digit and MSE. ``matcher``
+    is one of ``OCR_MATCHERS``.
+    """
+
+    def __init__(
+        self,
+        lazy_capture=True,
+        batch_scoring=None,
+        glyph_cache_size=DEFAULT_GLYPH_CACHE_SIZE,
+        native_templates=False,
+        template_cache_dir=None,
+        glyph_dir=DEFAULT_GLYPH_DIR,
+        predictive=True,
+        frame_source=None,
+        screen_size=None,
+        cascade=True,
+        matcher="ssd",
+    ):
+        if matcher not in OCR_MATCHERS:
+            raise ValueError(f"Unknown OCR matcher {matcher!r}")
+        self.base_bank = TemplateBank(TEMPLATES, BASE_DIGIT_WIDTH)
+        self.template_bank = self.base_bank
+        self.native_templates = native_templates
+        self.template_cache_dir = template_cache_dir
+        self.glyph_dir = glyph_dir
+        self.native_banks = {}
+        self.glyph_cache = GlyphCache(glyph_cache_size)
+        self.resample_plan = None
+        self.lazy_capture = lazy_capture
+        self.matcher = matcher
+        # The NumPy batch and the SSD shortcuts in _predict only agree with
+        # the SSD matcher, so the binary matcher scores each slot itself.
+        if matcher != "ssd":
+            batch_scoring = False
+        # None until the first frame, so that NumPy is not imported at startup.
+        self.batch_scoring = batch_scoring
+        self.cascade = cascade
         self.counter = 0
         self.prev = 0
-        self.last_capture_signature = None
+        self.geometry = None
+        self.surface = None
+        self.gray_region = None
+        self.last_frame_key = None
+        self.frame_cache_hits = 0
+        self.frame_cache_misses = 0
+        self.capture_failures = 0
+        self.capture_failing = False
+        self.predictive = predictive
+        self.frame_source = frame_source
+        self.last_frame = None
+        self.screen_size = screen_size
+        self.last_offset = None
+        self.slot_memo = {}
+        self.clean_slots = 0
+        self.dirty_slots = 0
+        self.predictive_hits = 0
+        self.predictive_fallbacks = 0
+        self.preferred_offset = 0
+        self.misaligned_offset_mse = None
+        self.offset_samples = 0
+        self.offset_gate_hits = 0
+        self.offset_searches = 0
+
+    @property
+    def target_digits(self):
+        # Built on first use; matching works from the template bank.
+        from digits import TARGET_DIGITS
+
+        return TARGET_DIGITS
 
     def get_cs(self, debug=False) -> int:
         geometry = self._capture_geometry()
-        left = geometry["left"]
-        top = geometry["top"]
-        right = geometry["right"]
-        bottom = geometry["bottom"]
-        width = right - left
-        height = bottom - top
-        capture_width = width
-        if geometry["scale"] > 1.0:
-            capture_width += max(SCALED_NON_LEADING_OFFSETS)
-
-        self._log_capture_geometry(geometry)
-        data = capture_grayscale(left, top, capture_width, height)
-
-        result = self._read_digits(data, capture_width, geometry, offset_x=0)
-        first_digit = result["digits"][:1]
-        if geometry["scale"] > 1.0 and first_digit not in ("", "1"):
-            candidates = [
-                self._read_digits(data, capture_width, geometry, offset_x=offset)
-                for offset in SCALED_NON_LEADING_OFFSETS
-            ]
-            valid_candidates = [candidate for candidate in candidates if candidate["digits"]]
-            if valid_candidates:
-                result = min(
-                    valid_candidates,
-                    key=lambda candidate: candidate["average_mse"],
-                )
+        capture_width = geometry.capture_width
+        height = geometry.capture_height
+        frame = self.last_frame = self._capture_frame(geometry)
+        if frame is None:
+            return self.prev
+        digit_top = geometry.digit_top
+        digit_bottom = digit_top + geometry.digit_height
+        frame_key = (
+            geometry,
+            self._fingerprint(frame, capture_width, digit_top, digit_bottom),
+        )
+        if frame_key == self.last_frame_key:
+            self.frame_cache_hits += 1
+            return self.prev
+        self.frame_cache_misses += 1
+        self.last_frame_key = frame_key
+
+        if self.lazy_capture:
+            data = self._gray_region(frame, geometry)
+        else:
+            data = bgra_to_gray(frame, capture_width, height)
+
+        if self.predictive and self.last_offset is not None:
+            number = self._predict(data, capture_width, geometry)
+            if number is not None:
+                self.predictive_hits += 1
+                self.prev = number
+                return number
+            self.predictive_fallbacks += 1
+
+        scores = None
+        if self.batch_scoring is None:
+            self.batch_scoring = load_numpy() is not None
+        if self.batch_scoring:
+            offsets = (0,)
+            if geometry.scale > 1.0:
+                offsets += SCALED_NON_LEADING_OFFSETS
+            scores = self._score_slots(data, capture_width, geometry, offsets)
+
+        result = self._read_number(data, capture_width, geometry, scores=scores)
 
         string = result["digits"]
         number = int(string) if string else 0
+        self.last_offset = result["offset_x"] if string else None
         if debug:
             if number < self.prev or number > self.prev + 1:
                 print(f"prev: {self.prev}, curr: {number}")
-                print(data)
+                print(list(bgra_to_gray(frame, capture_width, height)))
         self.prev = number
         return number
 
-    def _capture_geometry(self):
-        screen_width = user32.GetSystemMetrics(0)
-        screen_height = user32.GetSystemMetrics(1)
-        scale = screen_height / BASE_SCREEN_HEIGHT if screen_height else 1.0
+    def _capture_frame(self, geometry):
+        if self.frame_source is not None:
+            return self.frame_source(geometry)
+        surface = self.surface
+        size = (geometry.capture_width, geometry.capture_height)
+        if surface is None or (surface.width, surface.height) != size:
+            self.close()
+            try:
+                surface = CaptureSurface(*size)
+            except OSError as exc:
+                # GDI runs out of handles or the desktop is locked; skip the
+                # tick and try again on the next one.
+                self.capture_failures += 1
+                if not self.capture_failing:
+                    self.capture_failing = True
+                    logger.warning(
+                        "OCR capture surface failed size=%sx%s: %s", *size, exc
+                    )
+                return None
+            self.surface = surface
+            self.capture_failing = False
+        return surface.capture(geometry.left, geometry.top)
 
-        def scaled(value):
-            return max(1, int(round(value * scale)))
+    def _gray_region(self, frame, geometry):
+        region = self.gray_region
+        if region is None or (region.width, region.height) != (
+            geometry.capture_width,
+            geometry.capture_height,
+        ):
+            region = self.gray_region = LazyGrayRegion(
+                frame,
+                geometry.capture_width,
+                geometry.capture_height,
+                row_start=geometry.digit_top,
+                row_stop=geometry.digit_top + geometry.digit_height,
+            )
+        else:
+            region.reset(frame)
+        return region
+
+    def close(self):
+        """Releases the capture surface; the next frame recreates it."""
+        self.gray_region = None
+        self.last_frame = None
+        if self.surface:
+            self.surface.close()
+            self.surface = None
 
-        left_offset = scaled(BASE_CAPTURE_LEFT_OFFSET)
-        right_offset = scaled(BASE_CAPTURE_RIGHT_OFFSET)
-        top = scaled(BASE_CAPTURE_TOP)
-        bottom = scaled(BASE_CAPTURE_BOTTOM)
-        digit_width = scaled(BASE_DIGIT_WIDTH)
-        digit_height = scaled(BASE_DIGIT_HEIGHT)
-        left_padding = 1 if scale > 1.0 else 0
+    def _fingerprint(self, frame, width, row_start, row_stop):
+        """Hashes the raw BGRA bytes of the digit rows."""
+        stride = width * 4
+        rows = memoryview(frame).cast("B")[row_start * stride : row_stop * stride]
+        return hashlib.blake2b(rows, digest_size=16).digest()
 
+    def stats(self):
         return {
-            "screen_width": screen_width,
-            "screen_height": screen_height,
-            "scale": scale,
-            "left": screen_width - left_offset - left_padding,
-            "top": top,
-            "right": screen_width - right_offset,
-            "bottom": bottom,
-            "left_padding": left_padding,
-            "digit_top": scaled(BASE_DIGIT_TOP),
-            "digit_width": digit_width,
-            "digit_height": digit_height,
-            "first_digit_spacing": scaled(BASE_FIRST_DIGIT_SPACING),
-            "digit_spacing": scaled(BASE_DIGIT_SPACING),
+            "frame_cache_hits": self.frame_cache_hits,
+            "frame_cache_misses": self.frame_cache_misses,
+            "capture_failures": self.capture_failures,
+            "predictive_hits": self.predictive_hits,
+            "predictive_fallbacks": self.predictive_fallbacks,
+            "offset_gate_hits": self.offset_gate_hits,
+            "offset_searches": self.offset_searches,
+            "clean_slots": self.clean_slots,
+            "dirty_slots": self.dirty_slots,
+            "glyph_cache_size": len(self.glyph_cache),
+            "glyph_cache_hits": self.glyph_cache.hits,
+            "glyph_cache_misses": self.glyph_cache.misses,
+            "glyph_cache_evictions": self.glyph_cache.evictions,
+            "cascade_slots": self.template_bank.cascade_slots,
+            "cascade_exact": self.template_bank.cascade_exact,
+            "binary_fallbacks": self.template_bank.binary_fallbacks,
         }
 
-    def _log_capture_geometry(self, geometry):
-        signature = (
-            geometry["screen_width"],
-            geometry["screen_height"],
-            geometry["left"],
-            geometry["top"],
-            geometry["right"],
-            geometry["bottom"],
-            geometry["left_padding"],
-            geometry["digit_top"],
-            geometry["digit_width"],
-            geometry["digit_height"],
+    def log_stats(self, reason):
+        logger.info(
+            "OCR stats reason=%s %s",
+            reason,
+            " ".join(f"{key}={value}" for key, value in self.stats().items()),
         )
-        if signature == self.last_capture_signature:
-            return
-        self.last_capture_signature = signature
+
+    def _capture_geometry(self):
+        if self.geometry is None:
+            if self.screen_size is not None:
+                screen_width, screen_height = self.screen_size
+            else:
+                screen_width = user32.GetSystemMetrics(0)
+                screen_height = user32.GetSystemMetrics(1)
+            self.geometry = compute_capture_geometry(screen_width, screen_height)
+            self._log_capture_geometry(self.geometry)
+            self._select_template_bank(self.geometry)
+        return self.geometry
+
+    def _select_template_bank(self, geometry):
+        """Matches at the live digit size when native templates are enabled."""
+        size = (geometry.digit_width, geometry.digit_height)
+        if not self.native_templates or size == (BASE_DIGIT_WIDTH, BASE_DIGIT_HEIGHT):
+            bank = self.base_bank
+        else:
+            bank = self.native_banks.get(size)
+            if bank is None:
+                bank = self.native_banks[size] = build_native_bank(
+                    self._native_template_source(),
+                    BASE_DIGIT_WIDTH,
+                    *size,
+                    cache_dir=self.template_cache_dir,
+                )
+                logger.info("OCR native template bank ready size=%sx%s", *size)
+        if bank is not self.template_bank:
+            self.template_bank = bank
+            self.glyph_cache.clear()
+            self.slot_memo.clear()
+            self._reset_offset_calibration()
+
+    def _native_template_source(self):
+        """The glyph images when they load, the built-in templates otherwise."""
+        glyphs = None
+        if self.glyph_dir:
+            glyphs = load_glyph_templates(
+                self.glyph_dir, len(TEMPLATES), BASE_DIGIT_WIDTH, BASE_DIGIT_HEIGHT
+            )
+        return glyphs or TEMPLATES
+
+    def invalidate_geometry(self):
+        """Forces the next frame to re-read the screen size."""
+        self.geometry = None
+        self.last_offset = None
+        self.slot_memo.clear()
+        self._reset_offset_calibration()
+
+    def _log_capture_geometry(self, geometry):
         logger.info(
             "OCR capture geometry screen=%sx%s scale=%.3f bounds=%s,%s,%s,%s left_padding=%s digit_top=%s digit_size=%sx%s spacing=%s/%s",
-            geometry["screen_width"],
-            geometry["screen_height"],
-            geometry["scale"],
-            geometry["left"],
-            geometry["top"],
-            geometry["right"],
-            geometry["bottom"],
-            geometry["left_padding"],
-            geometry["digit_top"],
-            geometry["digit_width"],
-            geometry["digit_height"],
-            geometry["first_digit_spacing"],
-            geometry["digit_spacing"],
+            geometry.screen_width,
+            geometry.screen_height,
+            geometry.scale,
+            geometry.left,
+            geometry.top,
+            geometry.right,
+            geometry.bottom,
+            geometry.left_padding,
+            geometry.digit_top,
+            geometry.digit_width,
+            geometry.digit_height,
+            geometry.first_digit_spacing,
+            geometry.digit_spacing,
         )
 
-    def _extract_digit(self, data, width, x, digit_top, digit_width, digit_height):
-        if x < 0 or x + digit_width > width:
-            return []
-        pixels = []
-        for row in range(digit_height):
-            offset = (digit_top + row) * width + x
-            pixels.extend(data[offset : offset + digit_width])
-        if digit_width != BASE_DIGIT_WIDTH or digit_height != BASE_DIGIT_HEIGHT:
+    def _predict(self, data, width, geometry):
+        """Confirms ``prev`` or a small step up without a full digit walk.
+
+        Each candidate is laid out where ``_read_number`` would look first: at
+        offset 0, or on scaled resolutions at the preferred offset unless it
+        starts with 1. It passes if every slot classifies as its expected
+        template. On scaled resolutions its average MSE must also be under the
+        calibrated offset threshold, since a number read at the wrong offset
+        can still classify slot by slot; until that is calibrated the walk
+        always runs. Unchanged slots reuse their memoised result; for the rest
+        an SSD within ``confident_ssd`` of a candidate template settles it
+        without scoring the other templates. Returns ``None`` when no
+        candidate passes.
+        """
+        scaled = geometry.scale > 1.0
+        threshold = self._offset_threshold() if scaled else None
+        if scaled and threshold is None:
+            return None
+        limit = self.template_bank.confident_ssd if self.matcher == "ssd" else None
+        candidates = []
+        for number in range(self.prev, self.prev + PREDICTED_CS_STEPS + 1):
+            digits = str(number)
+            offset_x = 0
+            if scaled and digits[0] != "1":
+                offset_x = self.preferred_offset
+            candidates.append(
+                (number, self._expected_slots(geometry, offset_x, digits))
+            )
+        likely = {}
+        for _, expected in candidates:
+            for x, template in expected.items():
+                if template not in likely.setdefault(x, []):
+                    likely[x].append(template)
+        matched = {}
+        for number, expected in candidates:
+            total_mse = 0.0
+            for x, template in expected.items():
+                if x not in matched:
+                    digit, mse = self._classify_slot(
+                        data, width, geometry, x, likely=likely[x], limit=limit
+                    )
+                    matched[x] = (int(digit) if digit else BLANK_TEMPLATE, mse)
+                found, mse = matched[x]
+                if found != template:
+                    break
+                if template != BLANK_TEMPLATE:
+                    total_mse += mse
+            else:
+                # Averaged over the digits only, like ``_read_digits``.
+                if threshold is None or total_mse / (len(expected) - 1) <= threshold:
+                    return number
+        return None
+
+    def _expected_slots(self, geometry, offset_x, digits):
+        """Maps the x of each slot in ``digits`` to its template, then a blank."""
+        slots = {}
+        x = offset_x
+        for index, digit in enumerate(digits):
+            slots[x] = int(digit)
+            if index == 0 and digit == "1":
+                x += geometry.first_digit_spacing
+            else:
+                x += geometry.digit_spacing
+        slots[x] = BLANK_TEMPLATE
+        return slots
+
+    def _classify_slot(self, data, width, geometry, x, likely=(), limit=None):
+        """Returns ``(digit, mse)`` for the slot at ``x``.
+
+        Slots whose raw pixels match the last ones seen at the same ``x``
+        reuse that result; only dirty slots are resized and matched. Templates
+        in ``likely`` are tried first and accepted outright when their SSD is
+        within ``limit``.
+        """
+        raw = self._slot_pixels(data, width, geometry, x)
+        if raw is None:
+            # The walk reads a slot past the capture edge as blank.
+            return "", float("inf")
+        entry = self.slot_memo.get(x)
+        if entry is not None and entry[0] == raw:
+            self.clean_slots += 1
+            return entry[1]
+        self.dirty_slots += 1
+
+        pixels = self._resize_slot(raw, geometry.digit_width, geometry.digit_height)
+        bank = self.template_bank
+        result = None
+        if limit is not None:
+            for template in likely:
+                ssd = bank.ssd(pixels, template, limit)
+                if ssd is not None:
+                    digit = str(template) if template != BLANK_TEMPLATE else ""
+                    result = (digit, ssd / bank.size)
+                    break
+        if result is None:
+            result = self._most_similar_digit_with_mse(
+                pixels, hint=likely[0] if likely else None
+            )
+        self.slot_memo[x] = (raw, result)
+        return result
+
+    def _slot_pixels(self, data, width, geometry, x):
+        """Raw luma bytes of the slot at ``x`` before any resize, or ``None``."""
+        if x < 0 or x + geometry.digit_width > width:
+            return None
+        return _read_block(
+            data, width, x, geometry.digit_top, geometry.digit_width, geometry.digit_height
+        )
+
+    def _resize_slot(self, pixels, digit_width, digit_height):
+        bank = self.template_bank
+        if digit_width != bank.row_length or digit_height != bank.height:
             return self._resize_digit(
-                pixels,
-                digit_width,
-                digit_height,
-                BASE_DIGIT_WIDTH,
-                BASE_DIGIT_HEIGHT,
+                pixels, digit_width, digit_height, bank.row_length, bank.height
             )
         return pixels
 
-    def _read_digits(self, data, width, geometry, offset_x=0):
+    def _read_number(self, data, width, geometry, scores=None):
+        """Walks the digits, retrying the scaled offsets only when in doubt.
+
+        On scaled resolutions a leading digit other than 1 can start one or
+        two columns further right. The offset that won last time is read
+        first and kept if its average MSE is under the calibrated threshold;
+        otherwise offset 0 and the scaled offsets are compared and the one
+        with the lowest average MSE wins.
+        """
+        if geometry.scale <= 1.0:
+            return self._read_digits(data, width, geometry, offset_x=0, scores=scores)
+
+        preferred = self.preferred_offset
+        result = self._read_digits(
+            data, width, geometry, offset_x=preferred, scores=scores
+        )
+        first_digit = result["digits"][:1]
+        if preferred == 0 and first_digit in ("", "1"):
+            return result
+        threshold = self._offset_threshold()
+        if (
+            threshold is not None
+            and first_digit not in ("", "1")
+            and result["average_mse"] <= threshold
+        ):
+            self.offset_gate_hits += 1
+            return result
+
+        self.offset_searches += 1
+        if preferred != 0:
+            result = self._read_digits(data, width, geometry, offset_x=0, scores=scores)
+            if result["digits"][:1] in ("", "1"):
+                self.preferred_offset = 0
+                return result
+        candidates = [
+            self._read_digits(data, width, geometry, offset_x=offset, scores=scores)
+            for offset in SCALED_NON_LEADING_OFFSETS
+        ]
+        valid_candidates = [candidate for candidate in candidates if candidate["digits"]]
+        if valid_candidates:
+            winner = min(
+                valid_candidates,
+                key=lambda candidate: candidate["average_mse"],
+            )
+            self._observe_misaligned(
+                [
+                    candidate["average_mse"]
+                    for candidate in [result, *valid_candidates]
+                    if candidate["digits"]
+                    and (
+                        candidate["digits"] != winner["digits"]
+                        or candidate["average_mse"]
+                        > winner["average_mse"] * OFFSET_TIE_RATIO
+                    )
+                ]
+            )
+            result = winner
+        self.preferred_offset = result["offset_x"]
+        return result
+
+    def _offset_threshold(self):
+        if self.offset_samples < OFFSET_CALIBRATION_SAMPLES:
+            return None
+        return self.misaligned_offset_mse * OFFSET_MSE_MARGIN
+
+    def _observe_misaligned(self, misaligned_mses):
+        if not misaligned_mses:
+            return
+        lowest = min(misaligned_mses)
+        if self.misaligned_offset_mse is None or lowest < self.misaligned_offset_mse:
+            self.misaligned_offset_mse = lowest
+        self.offset_samples += 1
+
+    def _reset_offset_calibration(self):
+        self.preferred_offset = 0
+        self.misaligned_offset_mse = None
+        self.offset_samples = 0
+
+    def _read_digits(self, data, width, geometry, offset_x=0, scores=None):
         digits = []
         matches = []
+        hints = [int(digit) for digit in str(self.prev)] + [BLANK_TEMPLATE]
         x = offset_x
-        currdigit, mse = self._most_similar_digit_with_mse(
-            self._extract_digit(
-                data,
-                width,
-                x,
-                digit_top=geometry["digit_top"],
-                digit_width=geometry["digit_width"],
-                digit_height=geometry["digit_height"],
-            )
+        currdigit, mse = self._read_slot(
+            data, width, geometry, x, hint=hints[0], scores=scores
         )
         while currdigit != "":
             digits.append(currdigit)
             matches.append(mse)
             if len(digits) == 1 and currdigit == "1":
-                x += geometry["first_digit_spacing"]
+                x += geometry.first_digit_spacing
             else:
-                x += geometry["digit_spacing"]
-            currdigit, mse = self._most_similar_digit_with_mse(
-                self._extract_digit(
-                    data,
-                    width,
-                    x,
-                    digit_top=geometry["digit_top"],
-                    digit_width=geometry["digit_width"],
-                    digit_height=geometry["digit_height"],
-                )
+                x += geometry.digit_spacing
+            hint = hints[len(digits)] if len(digits) < len(hints) else None
+            currdigit, mse = self._read_slot(
+                data, width, geometry, x, hint=hint, scores=scores
             )
 
         return {
@@ -375,46 +817,88 @@ class CSOCR:
             "average_mse": sum(matches) / len(matches) if matches else float("inf"),
         }
 
+    def _read_slot(self, data, width, geometry, x, hint=None, scores=None):
+        if scores is not None:
+            return scores.get(x, ("", float("inf")))
+        return self._classify_slot(
+            data, width, geometry, x, likely=() if hint is None else (hint,)
+        )
+
+    def _slot_positions(self, width, geometry, offset_x):
+        """Every x the digit walk can visit from ``offset_x`` inside ``width``."""
+        last = width - geometry.digit_width
+        positions = set()
+        for start in (
+            offset_x + geometry.digit_spacing,
+            offset_x + geometry.first_digit_spacing,
+        ):
+            positions.update(range(start, last + 1, geometry.digit_spacing))
+        if 0 <= offset_x <= last:
+            positions.add(offset_x)
+        return positions
+
+    def _score_slots(self, data, width, geometry, offsets):
+        positions = sorted(
+            set().union(
+                *(self._slot_positions(width, geometry, offset) for offset in offsets)
+            )
+        )
+        scores = {}
+        pending = []
+        for x in positions:
+            raw = self._slot_pixels(data, width, geometry, x)
+            entry = self.slot_memo.get(x)
+            if entry is not None and entry[0] == raw:
+                self.clean_slots += 1
+                scores[x] = entry[1]
+                continue
+            self.dirty_slots += 1
+            slot = bytes(
+                self._resize_slot(raw, geometry.digit_width, geometry.digit_height)
+            )
+            cached = self.glyph_cache.get(slot)
+            if cached is None:
+                pending.append((x, raw, slot))
+            else:
+                scores[x] = cached
+                self.slot_memo[x] = (raw, cached)
+        size = self.template_bank.size
+        matches = self.template_bank.match_batch([slot for _, _, slot in pending])
+        for (x, raw, slot), (index, ssd) in zip(pending, matches):
+            scores[x] = (str(index) if index != BLANK_TEMPLATE else "", ssd / size)
+            self.glyph_cache.put(slot, scores[x])
+            self.slot_memo[x] = (raw, scores[x])
+        return scores
+
     def _resize_digit(self, pixels, source_width, source_height, target_width, target_height):
-        resized = []
-        for target_y in range(target_height):
-            y0 = int(target_y * source_height / target_height)
-            y1 = int((target_y + 1) * source_height / target_height)
-            y1 = max(y0 + 1, y1)
-            for target_x in range(target_width):
-                x0 = int(target_x * source_width / target_width)
-                x1 = int((target_x + 1) * source_width / target_width)
-                x1 = max(x0 + 1, x1)
-                total = 0
-                count = 0
-                for source_y in range(y0, min(y1, source_height)):
-                    offset = source_y * source_width
-                    for source_x in range(x0, min(x1, source_width)):
-                        total += pixels[offset + source_x]
-                        count += 1
-                resized.append(total // count if count else 0)
-        return resized
+        key = (source_width, source_height, target_width, target_height)
+        if self.resample_plan is None or self.resample_plan.key != key:
+            self.resample_plan = ResamplePlan(*key)
+        return self.resample_plan.resize(pixels)
 
     def most_similar_digit(self, digit_data) -> str:
         digit, _mse = self._most_similar_digit_with_mse(digit_data)
         return digit
 
-    def _most_similar_digit_with_mse(self, digit_data):
-        if not digit_data or len(digit_data) != len(self.target_digits[0]):
+    def _most_similar_digit_with_mse(self, digit_data, hint=None):
+        if not digit_data or len(digit_data) != self.template_bank.size:
             return "", float("inf")
-        min_mse = None
-        min_index = 0
-        for index, target in enumerate(self.target_digits):
-            mse = 0
-            for a, b in zip(target, digit_data):
-                diff = a - b
-                mse += diff * diff
-            mse /= len(target)
-            if min_mse is None or mse < min_mse:
-                min_mse = mse
-                min_index = index
-        digit = str(min_index) if min_index != 10 else ""
-        return digit, min_mse
+        key = bytes(digit_data)
+        cached = self.glyph_cache.get(key)
+        if cached is not None:
+            return cached
+        bank = self.template_bank
+        if self.matcher == "binary":
+            match = bank.match_binary
+        elif self.cascade:
+            match = bank.match_cascade
+        else:
+            match = bank.match
+        index, ssd = match(digit_data, hint)
+        digit = str(index) if index != BLANK_TEMPLATE else ""
+        result = (digit, ssd / bank.size)
+        self.glyph_cache.put(key, result)
+        return result
 
 
 def _ensure_winhttp_handles():
@@ -434,7 +918,52 @@ def _ensure_winhttp_handles():
     return _winhttp_session and _winhttp_connection
 
 
-def _close_winhttp_handles():
+def parse_game_time(data, length=None):
+    """``gameTime`` in seconds from the first ``length`` bytes of a gamestats body.
+
+    The number after the first ``"gameTime":`` within ``GAME_TIME_SCAN_LIMIT``
+    bytes is read in place. Anything unexpected, such as the key missing or
+    not followed by a plain number, falls back to ``json.loads``. Returns
+    ``None`` for a body without ``gameTime``, such as the "No active game"
+    error the API sends outside a game.
+    """
+    if length is None:
+        length = len(data)
+    start = data.find(GAME_TIME_KEY, 0, min(length, GAME_TIME_SCAN_LIMIT))
+    if start >= 0:
+        start += len(GAME_TIME_KEY)
+        limit = min(length, start + GAME_TIME_MAX_DIGITS)
+        end = data.find(b",", start, limit)
+        if end < 0:
+            end = data.find(b"}", start, limit)
+        if end >= 0:
+            # float() skips the whitespace around the number and rejects
+            # null, strings and anything else that is not one.
+            try:
+                return float(data[start:end])
+            except ValueError:
+                pass
+    payload = json.loads(data[:length])
+    game_time = payload.get("gameTime") if isinstance(payload, dict) else None
+    return None if game_time is None else float(game_time)
+
+
+def _reserve_receive_buffer(size):
+    """Grows the receive buffer to hold at least ``size`` bytes, keeping its data."""
+    global _receive_buffer, _receive_array
+    if size <= len(_receive_buffer):
+        return
+    capacity = len(_receive_buffer)
+    while capacity < size:
+        capacity *= 2
+    buffer = bytearray(capacity)
+    buffer[: len(_receive_buffer)] = _receive_buffer
+    _receive_buffer = buffer
+    _receive_array = (ctypes.c_char * capacity).from_buffer(buffer)
+
+
+def close_winhttp_handles():
+    """Releases the pooled WinHTTP handles; the next request reopens them."""
     global _winhttp_session, _winhttp_connection
     if _winhttp_connection:
         winhttp.WinHttpCloseHandle(_winhttp_connection)
@@ -444,10 +973,24 @@ def _close_winhttp_handles():
         _winhttp_session = None
 
 
-def gettime():
-    """Returns the time in minutes since the start of the game"""
+def _request_failed(step):
+    # The session and connection stay pooled: outside a game every request
+    # fails, and rebuilding them each time buys nothing. Closing the request
+    # handle is enough to drop a stuck socket.
+    error = kernel32.GetLastError()
+    if error == ERROR_WINHTTP_TIMEOUT:
+        raise DeadlineExceeded(f"game time request timed out during {step}")
+    return None
+
+
+def fetch_game_time(timeouts=DEFAULT_REQUEST_TIMEOUTS):
+    """Requests ``gameTime`` in seconds from the Live Client Data API.
+
+    Returns ``None`` when the request fails and raises ``DeadlineExceeded``
+    when it runs past one of the ``timeouts``.
+    """
     if not _ensure_winhttp_handles():
-        return 1
+        return None
 
     request = None
     try:
@@ -461,7 +1004,7 @@ def gettime():
             WINHTTP_FLAG_SECURE,
         )
         if not request:
-            return 1
+            return None
 
         security_flags = wintypes.DWORD(WINHTTP_SECURITY_FLAGS)
         winhttp.WinHttpSetOption(
@@ -470,39 +1013,48 @@ def gettime():
             ctypes.byref(security_flags),
             ctypes.sizeof(security_flags),
         )
+        winhttp.WinHttpSetTimeouts(
+            request,
+            WINHTTP_RESOLVE_TIMEOUT_MS,
+            timeouts.connect_ms,
+            timeouts.send_ms,
+            timeouts.receive_ms,
+        )
 
         if not winhttp.WinHttpSendRequest(request, None, 0, None, 0, 0, None):
-            _close_winhttp_handles()
-            return 1
+            return _request_failed("send")
         if not winhttp.WinHttpReceiveResponse(request, None):
-            _close_winhttp_handles()
-            return 1
+            return _request_failed("receive")
 
-        chunks = bytearray()
+        # Chunks land back to back in the reusable buffer, so reading a
+        # response allocates no buffers and copies nothing.
+        length = 0
         available = wintypes.DWORD()
         bytes_read = wintypes.DWORD()
         while True:
             available.value = 0
             if not winhttp.WinHttpQueryDataAvailable(request, ctypes.byref(available)):
-                _close_winhttp_handles()
-                return 1
+                return _request_failed("receive")
             if not available.value:
                 break
-            buffer = ctypes.create_string_buffer(available.value)
+            _reserve_receive_buffer(length + available.value)
             bytes_read.value = 0
             if not winhttp.WinHttpReadData(
-                request, buffer, available.value, ctypes.byref(bytes_read)
+                request,
+                ctypes.byref(_receive_array, length),
+                available.value,
+                ctypes.byref(bytes_read),
             ):
-                _close_winhttp_handles()
-                return 1
-            chunks.extend(buffer.raw[: bytes_read.value])
+                return _request_failed("receive")
+            length += bytes_read.value
 
-        payload = json.loads(chunks.decode("utf-8"))
-        return payload.get("gameTime", 0) / 60
+        return parse_game_time(_receive_buffer, length)
+    except DeadlineExceeded:
+        raise
     except Exception as exc:
         logger.debug("WinHTTP game time request failed: %s", exc)
-        _close_winhttp_handles()
-        return 1
+        close_winhttp_handles()
+        return None
     finally:
         if request:
             winhttp.WinHttpCloseHandle(request)
@@ -0,0 +1,136 @@
+"""Simulates a game to compare per-tick gameTime requests with GameClock.
+
+Run from the repository root: python bench/bench_clock.py
+The overlay ticks every ``--tick-ms`` against a simulated game that pauses
+now and then and whose API answers are off by up to ``--jitter`` seconds.
+Reported are requests per minute and how far the displayed time and CS/min
+stray from the truth. A second run sits in the client lobby, where every
+request fails, for ``--lobby-minutes`` before a game starts; it reports the
+failed requests per minute and how long the first game time takes to show.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gameclock import DEFAULT_SYNC_INTERVAL, GameClock  # noqa: E402
+
+MODES = (("per tick", None), ("no breaker", False), ("GameClock", True))
+
+
+class SimulatedGame:
+    """Game time as a function of local time, with pauses at random points."""
+
+    def __init__(self, minutes, pauses, pause_seconds, rng):
+        self.duration = minutes * 60
+        starts = sorted(rng.uniform(60, self.duration - 60) for _ in range(pauses))
+        self.pauses = [(start, start + pause_seconds) for start in starts]
+        self.local_time = 0.0
+
+    def game_time(self, local_time=None):
+        local_time = self.local_time if local_time is None else local_time
+        paused = sum(
+            max(0.0, min(local_time, stop) - start) for start, stop in self.pauses
+        )
+        return local_time - paused
+
+
+def run(args, use_clock):
+    rng = random.Random(args.seed)
+    game = SimulatedGame(args.minutes, args.pauses, args.pause_seconds, rng)
+    requests = 0
+
+    def fetch():
+        nonlocal requests
+        requests += 1
+        return max(0.0, game.game_time() + rng.uniform(-args.jitter, args.jitter))
+
+    clock = GameClock(fetch, sync_interval=args.sync_interval, clock=lambda: game.local_time)
+    tick = args.tick_ms / 1000
+    time_errors = []
+    rate_errors = []
+    while game.local_time < game.duration:
+        shown = clock.now() if use_clock else fetch()
+        truth = game.game_time()
+        if truth >= 60:
+            cs = int(truth / 60 * args.cs_per_min)
+            time_errors.append(abs(shown - truth))
+            rate_errors.append(abs(cs / (shown / 60) - cs / (truth / 60)))
+        game.local_time += tick
+    return {
+        "requests_per_min": requests / args.minutes,
+        "max_time_error": max(time_errors),
+        "mean_time_error": sum(time_errors) / len(time_errors),
+        "max_csmin_error": max(rate_errors),
+        "stats": clock.stats() if use_clock else None,
+    }
+
+
+def run_lobby(args, breaker):
+    game_start = args.lobby_minutes * 60
+    local_time = 0.0
+    requests = 0
+
+    def fetch():
+        nonlocal requests
+        requests += 1
+        return None if local_time < game_start else local_time - game_start
+
+    clock = GameClock(
+        fetch,
+        sync_interval=args.sync_interval,
+        clock=lambda: local_time,
+        breaker=None if breaker else False,
+    )
+    tick = args.tick_ms / 1000
+    lobby_requests = None
+    while True:
+        if local_time >= game_start and lobby_requests is None:
+            lobby_requests = requests
+        shown = fetch() if breaker is None else clock.now()
+        if shown is not None:
+            return {
+                "lobby_requests_per_min": lobby_requests / args.lobby_minutes,
+                "first_time_delay": local_time - game_start,
+            }
+        local_time += tick
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--tick-ms", type=int, default=500)
+    parser.add_argument("--sync-interval", type=float, default=DEFAULT_SYNC_INTERVAL)
+    parser.add_argument("--pauses", type=int, default=3)
+    parser.add_argument("--pause-seconds", type=float, default=20)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--cs-per-min", type=float, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lobby-minutes", type=float, default=5)
+    args = parser.parse_args()
+
+    for label, use_clock in (("per tick", False), ("GameClock", True)):
+        result = run(args, use_clock)
+        print(
+            f"{label:<10} {result['requests_per_min']:6.1f} requests/min  "
+            f"time error max {result['max_time_error']:.2f}s "
+            f"mean {result['mean_time_error']:.3f}s  "
+            f"CS/min error max {result['max_csmin_error']:.3f}"
+        )
+        if result["stats"]:
+            print("           " + " ".join(f"{k}={v}" for k, v in result["stats"].items()))
+
+    print(f"lobby for {args.lobby_minutes:g} minutes, then a game starts")
+    for label, breaker in MODES:
+        result = run_lobby(args, breaker)
+        print(
+            f"{label:<10} {result['lobby_requests_per_min']:6.1f} failed requests/min  "
+            f"first game time after {result['first_time_delay']:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
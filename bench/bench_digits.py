@@ -0,0 +1,103 @@
+"""Compares importing the digit templates from digits.bin with the old int literal.
+
+Run from the repository root: python bench/bench_digits.py
+Each measurement runs in a fresh interpreter with compiled bytecode already
+cached, like the frozen executable.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from digits import TEMPLATES  # noqa: E402
+
+
+PROBE = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, sys.argv[1])
+if sys.argv[2] == "memory":
+    tracemalloc.start()
+start = time.perf_counter()
+import digits
+templates = digits.TEMPLATES if hasattr(digits, "TEMPLATES") else digits.TARGET_DIGITS
+elapsed = time.perf_counter() - start
+current, peak = tracemalloc.get_traced_memory() if sys.argv[2] == "memory" else (0, 0)
+print(json.dumps({"seconds": elapsed, "current": current, "peak": peak}))
+"""
+
+
+def write_legacy_module(directory):
+    """Recreates the old ``digits.py``: one nested list literal, an int per line."""
+    body = "],\n [".join(
+        ",\n  ".join(str(value) for value in template) for template in TEMPLATES
+    )
+    with open(os.path.join(directory, "digits.py"), "w", encoding="utf-8") as f:
+        f.write(f"TARGET_DIGITS = [[{body}]]\n")
+
+
+def copy_binary_module(directory):
+    shutil.copy(os.path.join(ROOT, "digits.py"), directory)
+    shutil.copy(os.path.join(ROOT, "digits.bin"), directory)
+
+
+def probe(directory, mode):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, directory, mode],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def measure(directory, runs):
+    # The first import writes __pycache__, as the build does for the exe.
+    probe(directory, "time")
+    seconds = [probe(directory, "time")["seconds"] for _ in range(runs)]
+    memory = probe(directory, "memory")
+    return {
+        "median_us": statistics.median(seconds) * 1e6,
+        "min_us": min(seconds) * 1e6,
+        "traced_bytes": memory["current"],
+        "peak_bytes": memory["peak"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as legacy, tempfile.TemporaryDirectory() as blob:
+        write_legacy_module(legacy)
+        copy_binary_module(blob)
+        results = {
+            "int literal": measure(legacy, args.runs),
+            "digits.bin": measure(blob, args.runs),
+        }
+        sizes = {
+            "int literal": os.path.getsize(os.path.join(legacy, "digits.py")),
+            "digits.bin": os.path.getsize(os.path.join(blob, "digits.bin")),
+        }
+
+    baseline = results["int literal"]["median_us"]
+    for label, result in results.items():
+        print(
+            f"{label:<12} import {result['median_us']:8.1f} us median "
+            f"({baseline / result['median_us']:5.2f}x)  "
+            f"memory {result['traced_bytes'] / 1024:7.1f} KiB "
+            f"(peak {result['peak_bytes'] / 1024:7.1f} KiB)  "
+            f"resource {sizes[label]} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compares the old and new gamestats response readers on saved payloads.
+
+Run from the repository root: python bench/bench_gamestats.py [PAYLOAD ...]
+Without arguments it uses bench/payloads/, which holds bodies shaped like
+the Live Client Data API's gamestats responses and its error reply outside a
+game. ``ctypes.memmove`` stands in for ``WinHttpReadData``, handing each body
+over in ``--chunk`` byte pieces. Reported are the time per response and the
+peak memory traced while reading one.
+"""
+
+import argparse
+import ctypes
+import glob
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import Stats  # noqa: E402
+
+
+def chunks(payload, size):
+    return [payload[start : start + size] for start in range(0, len(payload), size)]
+
+
+def legacy_read(pieces):
+    """The old request loop: a new buffer per chunk, then json.loads."""
+    body = bytearray()
+    for piece in pieces:
+        buffer = ctypes.create_string_buffer(len(piece))
+        ctypes.memmove(buffer, piece, len(piece))
+        body.extend(buffer.raw[: len(piece)])
+    payload = json.loads(body.decode("utf-8"))
+    return float(payload.get("gameTime", 0))
+
+
+def buffered_read(pieces):
+    """The loop ``fetch_game_time`` uses: one reused buffer, then the fast path."""
+    length = 0
+    for piece in pieces:
+        Stats._reserve_receive_buffer(length + len(piece))
+        ctypes.memmove(ctypes.byref(Stats._receive_array, length), piece, len(piece))
+        length += len(piece)
+    return Stats.parse_game_time(Stats._receive_buffer, length)
+
+
+def traced_peak(func, pieces):
+    func(pieces)  # warm up caches and interned objects
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(pieces)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="*")
+    parser.add_argument("--chunk", type=int, default=8192)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = args.payloads or sorted(
+        glob.glob(os.path.join(ROOT, "bench", "payloads", "*.json"))
+    )
+    readers = {"legacy": legacy_read, "buffered": buffered_read}
+    for path in paths:
+        with open(path, "rb") as f:
+            payload = f.read()
+        pieces = chunks(payload, args.chunk)
+        results = {}
+        for label, func in readers.items():
+            seconds = min(
+                timeit.repeat(
+                    lambda: func(pieces), number=args.number, repeat=args.repeat
+                )
+            )
+            results[label] = (func(pieces), seconds / args.number, traced_peak(func, pieces))
+        expected = results["legacy"][0]
+        if Stats.GAME_TIME_KEY not in payload:
+            # The old reader turned the out-of-game error into gameTime 0.
+            expected = None
+        if results["buffered"][0] != expected:
+            raise SystemExit(f"{path}: readers disagree {results}")
+        fast = Stats.GAME_TIME_KEY in payload[: Stats.GAME_TIME_SCAN_LIMIT]
+        baseline = results["legacy"][1]
+        print(
+            f"{os.path.basename(path)} ({len(payload)} bytes, "
+            f"{'fast path' if fast else 'json fallback'}), gameTime {results['buffered'][0]}"
+        )
+        for label, (_, seconds, peak) in results.items():
+            print(
+                f"  {label:<9} {seconds * 1e6:7.2f} us/response  "
+                f"{baseline / seconds:5.2f}x  peak {peak:6d} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmarks BGRA-to-luma conversion for capture regions at common resolutions.
+
+Run from the repository root: python bench/bench_grayscale.py
+"""
+
+import argparse
+import ctypes
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import imaging  # noqa: E402
+
+
+# Capture box sizes produced by CSOCR for 1080p, 1440p and 2160p screens.
+REGIONS = {
+    "1080p": (30, 19),
+    "1440p": (43, 25),
+    "2160p": (63, 38),
+}
+
+
+def legacy_convert(buffer, width, height):
+    grayscale = []
+    for i in range(0, width * height * 4, 4):
+        b = buffer[i]
+        g = buffer[i + 1]
+        r = buffer[i + 2]
+        grayscale.append((r * 299 + g * 587 + b * 114) // 1000)
+    return grayscale
+
+
+def random_frame(width, height, seed):
+    rng = random.Random(seed)
+    size = width * height * 4
+    return (ctypes.c_ubyte * size)(*rng.randbytes(size))
+
+
+def time_call(func, number, repeat):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    converters = [("legacy loop", legacy_convert), ("lookup tables", None)]
+    if imaging.load_numpy() is not None:
+        converters.append(("numpy", None))
+
+    print(f"numpy available: {imaging.load_numpy() is not None}")
+    for name, (width, height) in REGIONS.items():
+        frame = random_frame(width, height, seed=width * height)
+        expected = bytes(legacy_convert(frame, width, height))
+        view = imaging._bgra_view(frame, width, height)
+        if imaging._bgra_to_gray_tables(view) != expected:
+            raise SystemExit(f"lookup-table conversion mismatch at {name}")
+        if imaging.load_numpy() is not None:
+            if imaging._bgra_to_gray_numpy(view) != expected:
+                raise SystemExit(f"numpy conversion mismatch at {name}")
+
+        results = {
+            "legacy loop": time_call(
+                lambda: legacy_convert(frame, width, height), args.number, args.repeat
+            ),
+            "lookup tables": time_call(
+                lambda: imaging._bgra_to_gray_tables(
+                    imaging._bgra_view(frame, width, height)
+                ),
+                args.number,
+                args.repeat,
+            ),
+        }
+        if imaging.load_numpy() is not None:
+            results["numpy"] = time_call(
+                lambda: imaging._bgra_to_gray_numpy(
+                    imaging._bgra_view(frame, width, height)
+                ),
+                args.number,
+                args.repeat,
+            )
+
+        baseline = results["legacy loop"]
+        print(f"{name} ({width}x{height}):")
+        for label, seconds in results.items():
+            print(
+                f"  {label:<14} {seconds * 1e6:9.1f} us/frame  "
+                f"{baseline / seconds:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measures cold import time of Stats and CS_Overlay with lazy Win32 binding.
+
+Run from the repository root: python bench/bench_import.py
+"eager" also binds every declared function right after import, which is the
+work the modules used to do at import time through ``ctypes.windll``. Off
+Windows the functions bind to the stub backend, so only the lazy numbers are
+meaningful there.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+module = __import__(sys.argv[2])
+if sys.argv[3] == "eager":
+    import win32
+    win32.bind_all()
+bound = time.perf_counter()
+import win32
+print(json.dumps({
+    "total": bound - start,
+    "declared": sum(lib.declared for lib in win32._libraries.values()),
+}))
+"""
+
+
+def probe(module, mode):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, ROOT, module, mode],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--modules", default="Stats,CS_Overlay")
+    args = parser.parse_args()
+
+    print(f"platform: {sys.platform}")
+    for module in args.modules.split(","):
+        probe(module, "lazy")  # compile and cache bytecode first
+        for mode in ("lazy", "eager"):
+            runs = [probe(module, mode) for _ in range(args.runs)]
+            total = statistics.median(run["total"] for run in runs) * 1e3
+            print(
+                f"{module:<11} {mode:<5} {total:7.2f} ms median "
+                f"({runs[0]['declared']} functions declared)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Microbenchmarks digit template matching against the original float-MSE scan.
+
+Run from the repository root: python bench/bench_matcher.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digits import TARGET_DIGITS  # noqa: E402
+from imaging import load_numpy  # noqa: E402
+from templates import BLANK_TEMPLATE, TemplateBank  # noqa: E402
+
+
+def legacy_match(digit_data):
+    min_mse = None
+    min_index = 0
+    for index, target in enumerate(TARGET_DIGITS):
+        mse = 0
+        for a, b in zip(target, digit_data):
+            diff = a - b
+            mse += diff * diff
+        mse /= len(target)
+        if min_mse is None or mse < min_mse:
+            min_mse = mse
+            min_index = index
+    return min_index, min_mse
+
+
+def noisy_slots(count, noise, seed):
+    rng = random.Random(seed)
+    slots = []
+    for _ in range(count):
+        index = rng.randrange(len(TARGET_DIGITS))
+        pixels = bytes(
+            min(255, max(0, value + rng.randint(-noise, noise)))
+            for value in TARGET_DIGITS[index]
+        )
+        slots.append((index, pixels))
+    return slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--noise", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bank = TemplateBank(TARGET_DIGITS, 10)
+    slots = noisy_slots(args.slots, args.noise, seed=args.noise)
+    size = bank.size
+
+    for expected, pixels in slots:
+        legacy_index, legacy_mse = legacy_match(pixels)
+        for hint in (None, expected, BLANK_TEMPLATE):
+            index, ssd = bank.match(pixels, hint)
+            if (index, ssd / size) != (legacy_index, legacy_mse):
+                raise SystemExit(f"TemplateBank disagrees with legacy, hint={hint}")
+            if bank.match_cascade(pixels, hint) != (index, ssd):
+                raise SystemExit(f"match_cascade disagrees with match, hint={hint}")
+    batch = bank.match_batch([pixels for _, pixels in slots])
+    if batch != [bank.match(pixels) for _, pixels in slots]:
+        raise SystemExit("TemplateBank.match_batch disagrees with TemplateBank.match")
+
+    cases = {
+        "legacy float MSE": lambda: [legacy_match(pixels) for _, pixels in slots],
+        "bank, no hint": lambda: [bank.match(pixels) for _, pixels in slots],
+        "bank, correct hint": lambda: [
+            bank.match(pixels, expected) for expected, pixels in slots
+        ],
+        "bank, blank hint": lambda: [
+            bank.match(pixels, BLANK_TEMPLATE) for _, pixels in slots
+        ],
+        "bank, batch": lambda: bank.match_batch([pixels for _, pixels in slots]),
+        "bank, cascade": lambda: [bank.match_cascade(pixels) for _, pixels in slots],
+        "bank, binary": lambda: [bank.match_binary(pixels) for _, pixels in slots],
+    }
+    print(f"{len(slots)} slots, noise +/-{args.noise}, results identical to legacy")
+    print(f"numpy available: {load_numpy() is not None}")
+    baseline = None
+    for label, func in cases.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat)) / len(slots)
+        baseline = baseline or seconds
+        print(f"  {label:<20} {seconds * 1e6:8.2f} us/slot  {baseline / seconds:5.2f}x")
+    print(
+        f"cascade: {bank.cascade_exact / bank.cascade_slots:.2f} full comparisons "
+        f"per slot out of {len(bank)}"
+    )
+    # The binary matcher is not exact, so it is scored rather than checked.
+    agree = sum(
+        bank.match_binary(pixels)[0] == bank.match(pixels)[0] for _, pixels in slots
+    )
+    correct = sum(bank.match_binary(pixels)[0] == expected for expected, pixels in slots)
+    print(
+        f"binary: agrees with match on {agree}/{len(slots)} slots, "
+        f"correct on {correct}/{len(slots)}, {bank.binary_fallbacks} SSD fallbacks"
+    )
+
+
+if __name__ == "__main__":
+    main()
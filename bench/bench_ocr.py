@@ -0,0 +1,226 @@
+"""Replays synthetic CS captures through CSOCR and reports throughput per stage.
+
+Run from the repository root: python bench/bench_ocr.py
+Results are also written as JSON so runs can be compared.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import imaging  # noqa: E402
+import Stats  # noqa: E402
+import templates  # noqa: E402
+from geometry import compute_capture_geometry  # noqa: E402
+from synthetic import cs_sequence, render_frame  # noqa: E402
+
+
+DEFAULT_RESOLUTIONS = "1920x1080,2560x1440,3840x2160"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+STAGES = {
+    "conversion": [(imaging, "_convert_view")],
+    "extraction": [(Stats.CSOCR, "_slot_pixels")],
+    "resize": [(Stats.CSOCR, "_resize_digit")],
+    "match": [
+        (templates.TemplateBank, "match"),
+        (templates.TemplateBank, "match_batch"),
+        (templates.TemplateBank, "match_cascade"),
+        (templates.TemplateBank, "match_binary"),
+        (templates.TemplateBank, "ssd"),
+    ],
+}
+
+
+class FrameReplay:
+    """Frame source that hands out pre-rendered frames in order."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    def __call__(self, geometry):
+        frame = self.frames[self.index]
+        self.index += 1
+        return frame
+
+
+class StageTimer:
+    """Wraps functions to collect exclusive time per stage.
+
+    Time spent in a nested stage, such as the lazy conversion triggered by
+    an extraction, is charged to the inner stage only.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.totals = dict.fromkeys(stages, 0.0)
+        self._stack = []
+        self._originals = []
+
+    def __enter__(self):
+        for stage, targets in self.stages.items():
+            for owner, name in targets:
+                original = getattr(owner, name)
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self._wrap(stage, original))
+        return self
+
+    def __exit__(self, *exc_info):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+
+    def _wrap(self, stage, function):
+        stack = self._stack
+        totals = self.totals
+
+        def timed(*args, **kwargs):
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = stack.pop()
+                totals[stage] += elapsed - nested
+                if stack:
+                    stack[-1] += elapsed
+
+        return timed
+
+
+def parse_resolutions(text):
+    resolutions = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def make_ocr(args, screen_size, frames):
+    return Stats.CSOCR(
+        lazy_capture=not args.no_lazy,
+        batch_scoring=False if args.no_batch else None,
+        glyph_cache_size=args.glyph_cache_size,
+        native_templates=args.native_templates,
+        predictive=not args.no_predictive,
+        frame_source=FrameReplay(frames),
+        screen_size=screen_size,
+        matcher=args.matcher,
+    )
+
+
+def replay(ocr, count):
+    return [ocr.get_cs() for _ in range(count)]
+
+
+def run_resolution(args, screen_size):
+    geometry = compute_capture_geometry(*screen_size)
+    rng = random.Random(args.seed)
+    values = cs_sequence(
+        args.frames, start=rng.randrange(0, 60), seed=args.seed
+    )
+    frames = [
+        render_frame(geometry, value, noise=args.noise, rng=random.Random(index))
+        for index, value in enumerate(values)
+    ]
+
+    best = None
+    for _ in range(args.repeat):
+        ocr = make_ocr(args, screen_size, frames)
+        start = time.perf_counter()
+        readings = replay(ocr, len(frames))
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+            stats = ocr.stats()
+    correct = sum(reading == value for reading, value in zip(readings, values))
+
+    ocr = make_ocr(args, screen_size, frames)
+    with StageTimer(STAGES) as timer:
+        start = time.perf_counter()
+        replay(ocr, len(frames))
+        instrumented = time.perf_counter() - start
+    stages_us = {
+        stage: seconds / len(frames) * 1e6 for stage, seconds in timer.totals.items()
+    }
+    stages_us["other"] = instrumented / len(frames) * 1e6 - sum(stages_us.values())
+
+    return {
+        "resolution": f"{screen_size[0]}x{screen_size[1]}",
+        "capture": f"{geometry.capture_width}x{geometry.capture_height}",
+        "frames": len(frames),
+        "fps": len(frames) / best,
+        "us_per_frame": best / len(frames) * 1e6,
+        "accuracy": correct / len(frames),
+        "stages_us_per_frame": stages_us,
+        "ocr_stats": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--noise", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--glyph-cache-size", type=int, default=256)
+    parser.add_argument("--native-templates", action="store_true")
+    parser.add_argument("--no-lazy", action="store_true")
+    parser.add_argument("--no-batch", action="store_true")
+    parser.add_argument("--no-predictive", action="store_true")
+    parser.add_argument("--matcher", default="ssd", choices=Stats.OCR_MATCHERS)
+    parser.add_argument("--output", help="JSON path, default bench/results/")
+    args = parser.parse_args()
+
+    # NumPy loads on first use; keep its import out of the first timed replay.
+    imaging.load_numpy()
+    results = [
+        run_resolution(args, screen_size)
+        for screen_size in parse_resolutions(args.resolutions)
+    ]
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": getattr(imaging.load_numpy(), "__version__", None),
+        "options": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "results": results,
+    }
+
+    print(f"numpy available: {imaging.load_numpy() is not None}")
+    for result in results:
+        stages = "  ".join(
+            f"{stage}={micros:.1f}"
+            for stage, micros in result["stages_us_per_frame"].items()
+        )
+        print(
+            f"{result['resolution']:>9}: {result['fps']:8.0f} frames/s "
+            f"{result['us_per_frame']:8.1f} us/frame  "
+            f"accuracy {result['accuracy']:.3f}"
+        )
+        print(f"           us/frame by stage: {stages}")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"ocr-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
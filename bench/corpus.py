@@ -0,0 +1,165 @@
+"""Renders every CS value at each supported resolution and scores the digit read.
+
+Run from the repository root: python bench/corpus.py
+Each frame is converted to luma up front, so the timing covers the digit walk
+(``CSOCR._read_digits`` plus the scaled offset retries) only. Values past 999
+need a fourth digit slot, which is wider than some capture boxes.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry import SCALED_NON_LEADING_OFFSETS, compute_capture_geometry  # noqa: E402
+from imaging import bgra_to_gray  # noqa: E402
+from recorder import FrameRecorder  # noqa: E402
+from Stats import CSOCR, OCR_MATCHERS  # noqa: E402
+from synthetic import render_frame  # noqa: E402
+
+
+DEFAULT_RESOLUTIONS = "1920x1080,2560x1440,3840x2160,1920x1200,2560x1600"
+
+
+def parse_resolutions(text):
+    resolutions = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def start_column(geometry, value, rng):
+    """Where the first digit lands: leading 1s at 0, others jittered when scaled."""
+    if geometry.scale > 1.0 and str(value)[0] != "1":
+        return rng.choice(SCALED_NON_LEADING_OFFSETS)
+    return 0
+
+
+def score(args, screen_size, source, recorder=None):
+    geometry = compute_capture_geometry(*screen_size)
+    width = geometry.capture_width
+    height = geometry.capture_height
+    ocr = CSOCR(
+        glyph_cache_size=args.glyph_cache_size if args.warm else 0,
+        native_templates=args.native_templates,
+        screen_size=screen_size,
+        cascade=args.cascade,
+        matcher=args.matcher,
+    )
+    ocr._capture_geometry()
+    # The cascade must not change a single read, so a plain-match reader
+    # follows the same frames for comparison.
+    reference = None
+    if args.compare_cascade:
+        reference = CSOCR(glyph_cache_size=0, cascade=False, screen_size=screen_size)
+        reference._capture_geometry()
+    rng = random.Random(args.seed)
+
+    elapsed = 0.0
+    failures = []
+    mismatches = 0
+    frames = 0
+    previous = 0
+    for value in range(args.min_value, args.max_value + 1):
+        frame = render_frame(
+            geometry,
+            value,
+            noise=args.noise,
+            rng=rng,
+            source=source,
+            start_x=start_column(geometry, value, rng),
+        )
+        if recorder:
+            recorder.record(geometry, frame, cs=value)
+        data = bgra_to_gray(frame, width, height)
+        if not args.warm:
+            ocr.slot_memo.clear()
+        ocr.prev = previous
+        start = time.perf_counter()
+        result = ocr._read_number(data, width, geometry)
+        elapsed += time.perf_counter() - start
+        if reference is not None:
+            reference.slot_memo.clear()
+            reference.prev = previous
+            if reference._read_number(data, width, geometry) != result:
+                mismatches += 1
+        reading = int(result["digits"]) if result["digits"] else 0
+        if reading != value:
+            failures.append((value, reading, result["offset_x"]))
+        previous = value
+        frames += 1
+
+    return {
+        "resolution": f"{screen_size[0]}x{screen_size[1]}",
+        "glyphs": source,
+        "scale": geometry.scale,
+        "digit_size": f"{geometry.digit_width}x{geometry.digit_height}",
+        "frames": frames,
+        "accuracy": 1 - len(failures) / frames,
+        "us_per_frame": elapsed / frames * 1e6,
+        "cascade_mismatches": mismatches if reference is not None else None,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--glyphs", default="target,png", help="target and/or png")
+    parser.add_argument("--min-value", type=int, default=0)
+    parser.add_argument("--max-value", type=int, default=1200)
+    parser.add_argument("--noise", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--glyph-cache-size", type=int, default=256)
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="keep slot and glyph caches between frames instead of reading cold",
+    )
+    parser.add_argument("--native-templates", action="store_true")
+    parser.add_argument("--no-cascade", dest="cascade", action="store_false")
+    parser.add_argument("--matcher", default="ssd", choices=OCR_MATCHERS)
+    parser.add_argument(
+        "--compare-cascade",
+        action="store_true",
+        help="re-read every frame with plain matching and count differences",
+    )
+    parser.add_argument("--show", type=int, default=5, help="failures to list")
+    parser.add_argument("--save", help="also write the frames as a recorder log")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    recorder = FrameRecorder(args.save) if args.save else None
+    results = []
+    try:
+        for screen_size in parse_resolutions(args.resolutions):
+            for source in args.glyphs.split(","):
+                result = score(args, screen_size, source, recorder)
+                results.append(result)
+                print(
+                    f"{result['resolution']:>9} {source:<6} "
+                    f"digits {result['digit_size']:<5} "
+                    f"accuracy {result['accuracy']:.4f}  "
+                    f"{result['us_per_frame']:8.1f} us/frame"
+                )
+                if result["cascade_mismatches"] is not None:
+                    print(f"    {result['cascade_mismatches']} reads differ without the cascade")
+                for value, reading, offset_x in result["failures"][: args.show]:
+                    print(f"    {value} read as {reading} at offset {offset_x}")
+    finally:
+        if recorder:
+            recorder.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"options": vars(args), "results": results}, f, indent=4)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
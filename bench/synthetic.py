@@ -0,0 +1,147 @@
+"""Renders synthetic CS counter captures for the OCR benchmarks.
+
+Digits are drawn from ``TARGET_DIGITS`` or the ``chars/*.png`` glyphs, scaled
+to the live digit size and laid out the way ``CSOCR`` walks them, including
+the narrower leading 1.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digits import TEMPLATES  # noqa: E402
+from geometry import BASE_DIGIT_HEIGHT, BASE_DIGIT_WIDTH  # noqa: E402
+from imaging import scale_bilinear  # noqa: E402
+from templates import (  # noqa: E402
+    BLANK_TEMPLATE,
+    DEFAULT_GLYPH_DIR,
+    load_glyph_templates,
+)
+
+
+BACKGROUND = 20
+
+_sources = {}
+_scaled_templates = {}
+
+
+def glyph_source(name):
+    """``"target"`` for ``TARGET_DIGITS``, ``"png"`` for the glyph images."""
+    if name not in _sources:
+        if name == "target":
+            _sources[name] = [bytes(template) for template in TEMPLATES]
+        elif name == "png":
+            glyphs = load_glyph_templates(
+                DEFAULT_GLYPH_DIR,
+                len(TEMPLATES),
+                BASE_DIGIT_WIDTH,
+                BASE_DIGIT_HEIGHT,
+            )
+            if glyphs is None:
+                raise FileNotFoundError(f"glyphs missing from {DEFAULT_GLYPH_DIR}")
+            _sources[name] = glyphs
+        else:
+            raise ValueError(f"unknown glyph source {name!r}")
+    return _sources[name]
+
+
+def scaled_templates(digit_width, digit_height, source="target"):
+    key = (digit_width, digit_height, source)
+    if key not in _scaled_templates:
+        _scaled_templates[key] = [
+            scale_bilinear(
+                template,
+                BASE_DIGIT_WIDTH,
+                BASE_DIGIT_HEIGHT,
+                digit_width,
+                digit_height,
+            )
+            for template in glyph_source(source)
+        ]
+    return _scaled_templates[key]
+
+
+def digit_positions(geometry, digits, start_x):
+    positions = []
+    x = start_x
+    for index, digit in enumerate(digits):
+        positions.append(x)
+        if index == 0 and digit == "1":
+            x += geometry.first_digit_spacing
+        else:
+            x += geometry.digit_spacing
+    return positions
+
+
+def render_gray(geometry, value, jitter=0, source="target", start_x=None):
+    """Returns the capture for ``value`` as one luma byte per pixel.
+
+    Unless ``start_x`` is given, a leading digit other than 1 starts
+    ``left_padding`` columns in on scaled resolutions, which is what the
+    offset retries in ``CSOCR`` expect. ``jitter`` shifts the whole number
+    right.
+    """
+    width = geometry.capture_width
+    height = geometry.capture_height
+    digit_width = geometry.digit_width
+    digit_height = geometry.digit_height
+    templates = scaled_templates(digit_width, digit_height, source)
+    gray = bytearray([BACKGROUND]) * (width * height)
+
+    blank = templates[BLANK_TEMPLATE]
+    for row in range(digit_height):
+        line = (geometry.digit_top + row) * width
+        for x in range(width):
+            gray[line + x] = blank[row * digit_width + x % digit_width]
+
+    digits = str(value)
+    if start_x is None:
+        start_x = 0 if digits[0] == "1" else geometry.left_padding
+    start_x += jitter
+    for x, digit in zip(digit_positions(geometry, digits, start_x), digits):
+        template = templates[int(digit)]
+        visible = min(digit_width, width - x)
+        if visible <= 0:
+            break
+        for row in range(digit_height):
+            line = (geometry.digit_top + row) * width + x
+            offset = row * digit_width
+            gray[line : line + visible] = template[offset : offset + visible]
+    return bytes(gray)
+
+
+def add_noise(gray, noise, rng):
+    if not noise:
+        return gray
+    return bytes(
+        [min(255, max(0, value + rng.randint(-noise, noise))) for value in gray]
+    )
+
+
+def gray_to_bgra(gray):
+    frame = bytearray(len(gray) * 4)
+    frame[0::4] = gray
+    frame[1::4] = gray
+    frame[2::4] = gray
+    frame[3::4] = b"\xff" * len(gray)
+    return bytes(frame)
+
+
+def render_frame(
+    geometry, value, noise=0, jitter=0, rng=None, source="target", start_x=None
+):
+    """Returns a top-down BGRA capture of ``value`` for ``geometry``."""
+    rng = rng or random.Random(value)
+    gray = render_gray(geometry, value, jitter, source=source, start_x=start_x)
+    return gray_to_bgra(add_noise(gray, noise, rng))
+
+
+def cs_sequence(count, start=0, steps=(0, 0, 1, 1, 2), seed=0):
+    """A non-decreasing run of CS values like the ones seen between ticks."""
+    rng = random.Random(seed)
+    values = [start]
+    while len(values) < count:
+        values.append(values[-1] + rng.choice(steps))
+    return values
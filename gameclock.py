@@ -0,0 +1,363 @@
+"""Game time from the Live Client Data API, extrapolated between requests.
+
+The in-game clock runs at wall-clock speed, so after one ``gameTime`` sample
+the time can be read off ``time.monotonic()`` until the next sync. A sync runs
+every ``sync_interval`` seconds, and sooner after the prediction has drifted
+or the game has stopped advancing (paused, or the API has gone away).
+
+Each sync publishes an immutable ``GameTimeSnapshot``. ``ClockPoller`` runs
+the syncs on a worker thread so that readers on the UI thread never wait on
+the network; they only pick up whichever snapshot is current. Outside a game
+every request fails, so a ``CircuitBreaker`` spaces the attempts out.
+"""
+
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger("cs_overlay")
+
+DEFAULT_SYNC_INTERVAL = 5.0
+# Syncs after a drift, a pause or a failed request come this often until the
+# clock looks steady again.
+RECHECK_INTERVAL = 1.0
+# Prediction error in game seconds that counts as drift rather than jitter.
+DRIFT_TOLERANCE = 0.5
+
+# Consecutive failures that open the breaker, and the bounds of its backoff.
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_DELAY = 2.0
+BREAKER_MAX_DELAY = 30.0
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half-open"
+
+STATUS_UNKNOWN = "unknown"
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"
+STATUS_FAILED = "failed"
+
+
+class DeadlineExceeded(Exception):
+    """Raised by a ``fetch`` whose request ran out of time."""
+
+
+class GameTimeSnapshot(NamedTuple):
+    # Game time in seconds at ``fetched_at``, or None when unknown.
+    game_time: Optional[float]
+    # Local monotonic time the response arrived.
+    fetched_at: float
+    status: str
+
+
+UNKNOWN_SNAPSHOT = GameTimeSnapshot(None, 0.0, STATUS_UNKNOWN)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open failure state machine with exponential backoff.
+
+    ``failure_threshold`` failures in a row open the breaker for
+    ``base_delay`` seconds. After that one probe at a time is let through
+    (half-open). If the probe succeeds the breaker closes; if it fails the
+    breaker opens again for twice as long, up to ``max_delay``. A probe
+    must end in ``record_success`` or ``record_failure``. ``clock`` is the
+    monotonic time source.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        base_delay=BREAKER_BASE_DELAY,
+        max_delay=BREAKER_MAX_DELAY,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max(base_delay, max_delay)
+        self.clock = clock
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.delay = base_delay
+        self.open_until = None
+        self.probing = False
+        self.opens = 0
+        self.probes = 0
+        self.rejections = 0
+
+    def allow(self):
+        """Whether a request may go out now."""
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN and self.clock() >= self.open_until:
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_HALF_OPEN and not self.probing:
+            self.probing = True
+            self.probes += 1
+            return True
+        self.rejections += 1
+        return False
+
+    def retry_in(self):
+        """Seconds until ``allow`` will let a request through.
+
+        0 while half-open, even if the probe is still in flight.
+        """
+        if self.state != BREAKER_OPEN:
+            return 0.0
+        return max(0.0, self.open_until - self.clock())
+
+    def record_success(self):
+        if self.state != BREAKER_CLOSED:
+            logger.info("Live client breaker closed after %s failures", self.failures)
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.delay = self.base_delay
+        self.open_until = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == BREAKER_HALF_OPEN:
+            self.delay = min(self.max_delay, self.delay * 2)
+            self._open()
+        elif self.state == BREAKER_CLOSED and self.failures >= self.failure_threshold:
+            self.delay = self.base_delay
+            self._open()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "opens": self.opens,
+            "probes": self.probes,
+            "rejections": self.rejections,
+        }
+
+    def _open(self):
+        if self.state == BREAKER_CLOSED:
+            logger.info("Live client breaker opened after %s failures", self.failures)
+        self.state = BREAKER_OPEN
+        self.open_until = self.clock() + self.delay
+        self.opens += 1
+
+
+class GameClock:
+    """Extrapolates the game clock from occasional ``fetch`` calls.
+
+    ``fetch`` returns the game time in seconds or ``None`` when the request
+    fails, and may raise ``DeadlineExceeded`` when it was too slow; the last
+    known clock then stays in place. Any other exception counts as a failed
+    request. ``clock`` is the local monotonic time
+    source. Requests go through ``breaker``, which by default is a
+    ``CircuitBreaker`` on the same clock; pass ``False`` to disable it. ``poll`` makes the
+    requests and ``read`` only looks at the published snapshot, so the two
+    can run on different threads; ``now`` does both.
+    """
+
+    def __init__(
+        self,
+        fetch,
+        sync_interval=DEFAULT_SYNC_INTERVAL,
+        drift_tolerance=DRIFT_TOLERANCE,
+        clock=time.monotonic,
+        breaker=None,
+    ):
+        self.fetch = fetch
+        self.sync_interval = max(RECHECK_INTERVAL, sync_interval)
+        self.drift_tolerance = drift_tolerance
+        self.clock = clock
+        if breaker is None:
+            breaker = CircuitBreaker(clock=clock)
+        self.breaker = breaker or None
+        # Replaced, never mutated, so a reader always sees a consistent one.
+        self.snapshot = UNKNOWN_SNAPSHOT
+        self.next_sync = None
+        self.reads = 0
+        self.syncs = 0
+        self.failures = 0
+        self.deadline_misses = 0
+        self.drifts = 0
+        self.pauses = 0
+
+    def now(self):
+        """Syncs if one is due, then returns ``read()``."""
+        self.poll()
+        return self.read()
+
+    def read(self):
+        """Game time in seconds from the current snapshot, or ``None``."""
+        self.reads += 1
+        snapshot = self.snapshot
+        if snapshot.game_time is None:
+            return None
+        if snapshot.status != STATUS_RUNNING:
+            return snapshot.game_time
+        return snapshot.game_time + (self.clock() - snapshot.fetched_at)
+
+    def minutes(self):
+        """Game time in minutes, or 1 while unknown so CS/min stays finite."""
+        game_time = self.read()
+        return 1 if game_time is None else game_time / 60
+
+    def poll(self):
+        """Syncs if one is due and returns the seconds until the next."""
+        if self.next_sync is None or self.clock() >= self.next_sync:
+            self._sync()
+        return max(0.0, self.next_sync - self.clock())
+
+    def reset(self):
+        self.snapshot = UNKNOWN_SNAPSHOT
+        self.next_sync = None
+
+    def stats(self):
+        stats = {
+            "reads": self.reads,
+            "syncs": self.syncs,
+            "failures": self.failures,
+            "deadline_misses": self.deadline_misses,
+            "drifts": self.drifts,
+            "pauses": self.pauses,
+            "status": self.snapshot.status,
+        }
+        if self.breaker:
+            stats.update(
+                (f"breaker_{key}", value) for key, value in self.breaker.stats().items()
+            )
+        return stats
+
+    def log_stats(self, reason):
+        logger.info(
+            "Game clock stats reason=%s %s",
+            reason,
+            " ".join(f"{key}={value}" for key, value in self.stats().items()),
+        )
+
+    def _sync(self):
+        breaker = self.breaker
+        if breaker and not breaker.allow():
+            # Only a probe still in flight leaves nothing to wait for.
+            self.next_sync = self.clock() + (breaker.retry_in() or RECHECK_INTERVAL)
+            return
+        self.syncs += 1
+        try:
+            game_time = self.fetch()
+        except DeadlineExceeded as exc:
+            # A slow API says nothing about the game itself, so the current
+            # snapshot keeps extrapolating until a request gets through.
+            self.deadline_misses += 1
+            logger.debug("Game clock %s", exc)
+            self._retry_later(self.clock())
+            return
+        except Exception:
+            # Anything else must still close out a half-open probe, or the
+            # breaker would turn every later request away.
+            logger.exception("Game clock fetch failed")
+            game_time = None
+        # Stamped on arrival: a slow response carries the game time from
+        # when the server answered, not from when it was asked.
+        local_time = self.clock()
+        if game_time is None:
+            self.failures += 1
+            self.snapshot = GameTimeSnapshot(None, local_time, STATUS_FAILED)
+            self._retry_later(local_time)
+            return
+        if breaker:
+            breaker.record_success()
+
+        previous = self.snapshot
+        steady = False
+        if previous.game_time is not None:
+            # Half the local time elapsed is well clear of request jitter
+            # and still tells a stopped clock from a running one.
+            elapsed = local_time - previous.fetched_at
+            advanced = game_time - previous.game_time > elapsed / 2
+            running = previous.status == STATUS_RUNNING
+            if running and not advanced:
+                self.pauses += 1
+                logger.debug("Game clock paused at game_time=%.1f", game_time)
+            elif running:
+                error = game_time - (previous.game_time + elapsed)
+                steady = abs(error) <= self.drift_tolerance
+                if not steady:
+                    self.drifts += 1
+                    logger.debug("Game clock drifted by %.2fs", error)
+            status = STATUS_RUNNING if advanced else STATUS_PAUSED
+        else:
+            # One sample cannot tell a running clock from a paused one; the
+            # game is far more often running, and the next sync settles it.
+            status = STATUS_RUNNING
+
+        self.snapshot = GameTimeSnapshot(game_time, local_time, status)
+        interval = self.sync_interval if steady else RECHECK_INTERVAL
+        self.next_sync = local_time + interval
+
+    def _retry_later(self, local_time):
+        delay = RECHECK_INTERVAL
+        if self.breaker:
+            self.breaker.record_failure()
+            delay = max(delay, self.breaker.retry_in())
+        self.next_sync = local_time + delay
+
+
+class ClockPoller:
+    """Runs ``GameClock.poll`` on a daemon thread while active.
+
+    ``on_stop`` runs on that thread once it stops polling, so whatever
+    ``fetch`` holds open is released by the thread that uses it.
+    """
+
+    def __init__(self, clock, on_stop=None):
+        self.clock = clock
+        self.on_stop = on_stop
+        self._active = threading.Event()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, daemon=True, name="game-clock"
+            )
+            self._thread.start()
+
+    def set_active(self, active):
+        """Polls only while active, e.g. while the game has focus."""
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        self._active.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        try:
+            self._poll_until_stopped()
+        finally:
+            if self.on_stop is not None:
+                self.on_stop()
+
+    def _poll_until_stopped(self):
+        while True:
+            self._active.wait()
+            if self._stopping:
+                return
+            try:
+                delay = self.clock.poll()
+            except Exception:
+                logger.exception("Game clock poll failed")
+                delay = RECHECK_INTERVAL
+            # set_active and stop cut the wait short.
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stopping:
+                return
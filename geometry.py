@@ -0,0 +1,72 @@
+from typing import NamedTuple
+
+
+BASE_SCREEN_HEIGHT = 1080
+BASE_CAPTURE_LEFT_OFFSET = 138
+BASE_CAPTURE_RIGHT_OFFSET = 108
+BASE_CAPTURE_TOP = 6
+BASE_CAPTURE_BOTTOM = 25
+BASE_DIGIT_TOP = 3
+BASE_DIGIT_WIDTH = 10
+BASE_DIGIT_HEIGHT = 12
+BASE_FIRST_DIGIT_SPACING = 9
+BASE_DIGIT_SPACING = 10
+SCALED_NON_LEADING_OFFSETS = (1, 2)
+
+
+class CaptureGeometry(NamedTuple):
+    """Where the CS counter sits on screen and how its digits are laid out.
+
+    ``capture_width`` includes the extra columns needed by the
+    ``SCALED_NON_LEADING_OFFSETS`` retries on scaled resolutions.
+    """
+
+    screen_width: int
+    screen_height: int
+    scale: float
+    left: int
+    top: int
+    right: int
+    bottom: int
+    left_padding: int
+    digit_top: int
+    digit_width: int
+    digit_height: int
+    first_digit_spacing: int
+    digit_spacing: int
+    capture_width: int
+    capture_height: int
+
+
+def compute_capture_geometry(screen_width, screen_height):
+    scale = screen_height / BASE_SCREEN_HEIGHT if screen_height else 1.0
+
+    def scaled(value):
+        return max(1, int(round(value * scale)))
+
+    left_padding = 1 if scale > 1.0 else 0
+    left = screen_width - scaled(BASE_CAPTURE_LEFT_OFFSET) - left_padding
+    top = scaled(BASE_CAPTURE_TOP)
+    right = screen_width - scaled(BASE_CAPTURE_RIGHT_OFFSET)
+    bottom = scaled(BASE_CAPTURE_BOTTOM)
+    capture_width = right - left
+    if scale > 1.0:
+        capture_width += max(SCALED_NON_LEADING_OFFSETS)
+
+    return CaptureGeometry(
+        screen_width=screen_width,
+        screen_height=screen_height,
+        scale=scale,
+        left=left,
+        top=top,
+        right=right,
+        bottom=bottom,
+        left_padding=left_padding,
+        digit_top=scaled(BASE_DIGIT_TOP),
+        digit_width=scaled(BASE_DIGIT_WIDTH),
+        digit_height=scaled(BASE_DIGIT_HEIGHT),
+        first_digit_spacing=scaled(BASE_FIRST_DIGIT_SPACING),
+        digit_spacing=scaled(BASE_DIGIT_SPACING),
+        capture_width=capture_width,
+        capture_height=bottom - top,
+    )
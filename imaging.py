@@ -0,0 +1,343 @@
+import struct
+import zlib
+from operator import itemgetter
+
+# Set by ``load_numpy``; importing NumPy costs about 100 ms, which startup
+# should not pay before the first frame.
+np = None
+_numpy_loaded = False
+
+
+RED_WEIGHT = 299
+GREEN_WEIGHT = 587
+BLUE_WEIGHT = 114
+WEIGHT_DIVISOR = 1000
+
+_RED_TABLE = [value * RED_WEIGHT for value in range(256)]
+_GREEN_TABLE = [value * GREEN_WEIGHT for value in range(256)]
+_BLUE_TABLE = [value * BLUE_WEIGHT for value in range(256)]
+
+
+def _bgra_view(buffer, width, height):
+    view = memoryview(buffer)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    size = width * height * 4
+    if len(view) < size:
+        raise ValueError(
+            f"BGRA buffer holds {len(view)} bytes, expected {size} for {width}x{height}"
+        )
+    return view[:size]
+
+
+def bgra_to_gray(buffer, width, height):
+    """Converts a top-down 32-bit BGRA buffer to one luma byte per pixel.
+
+    Matches ``(r * 299 + g * 587 + b * 114) // 1000`` bit for bit. Uses NumPy
+    when it is installed and per-channel lookup tables otherwise.
+    """
+    return _convert_view(_bgra_view(buffer, width, height))
+
+
+def _bgra_to_gray_tables(view):
+    red = _RED_TABLE
+    green = _GREEN_TABLE
+    blue = _BLUE_TABLE
+    return bytes(
+        [
+            (red[r] + green[g] + blue[b]) // WEIGHT_DIVISOR
+            for b, g, r in zip(view[0::4], view[1::4], view[2::4])
+        ]
+    )
+
+
+def load_numpy():
+    """Imports NumPy on the first call and returns it, or ``None`` if missing."""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+def _bgra_to_gray_numpy(view):
+    pixels = np.frombuffer(view, dtype=np.uint8).reshape(-1, 4).astype(np.uint32)
+    gray = (
+        pixels[:, 2] * RED_WEIGHT
+        + pixels[:, 1] * GREEN_WEIGHT
+        + pixels[:, 0] * BLUE_WEIGHT
+    ) // WEIGHT_DIVISOR
+    return gray.astype(np.uint8).tobytes()
+
+
+def _convert_view(view):
+    if load_numpy() is not None:
+        return _bgra_to_gray_numpy(view)
+    return _bgra_to_gray_tables(view)
+
+
+class LazyGrayRegion:
+    """Grayscale view of a BGRA capture that converts pixels on first access.
+
+    Only rows ``row_start`` to ``row_stop`` are readable, and each read converts
+    the requested columns for all of those rows at once. Indexing uses the
+    coordinates of the full capture, so it can stand in for the list returned
+    by ``bgra_to_gray`` as long as slices stay within one row.
+    """
+
+    def __init__(self, buffer, width, height, row_start, row_stop):
+        self.width = width
+        self.height = height
+        self.row_start = max(0, row_start)
+        self.row_stop = min(height, row_stop)
+        self._rows = bytearray(width * max(0, self.row_stop - self.row_start))
+        self._converted = bytearray(width)
+        self._bgra = None
+        self.reset(buffer)
+
+    def reset(self, buffer):
+        """Points the region at a new frame of the same size, reusing storage.
+
+        The BGRA buffer is read in place, so it must not change until the
+        region is reset again.
+        """
+        stride = self.width * 4
+        self._bgra = _bgra_view(buffer, self.width, self.height)[
+            self.row_start * stride : self.row_stop * stride
+        ]
+        self._converted[:] = bytes(self.width)
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("LazyGrayRegion only supports contiguous slices")
+            if stop <= start:
+                return b""
+            count = stop - start
+        else:
+            start = key + len(self) if key < 0 else key
+            count = 1
+
+        row, x0 = divmod(start, self.width)
+        x1 = x0 + count
+        if x1 > self.width or not self.row_start <= row < self.row_stop:
+            raise IndexError(
+                f"pixels {start}..{start + count} are outside rows "
+                f"{self.row_start}..{self.row_stop} of the converted region"
+            )
+        self._convert_columns(x0, x1)
+        offset = (row - self.row_start) * self.width
+        if isinstance(key, slice):
+            return bytes(self._rows[offset + x0 : offset + x1])
+        return self._rows[offset + x0]
+
+    @property
+    def converted_columns(self):
+        return self._converted.count(1)
+
+    def block(self, x, y, width, height):
+        """Returns a ``width`` x ``height`` block of luma bytes, row by row."""
+        if x < 0 or x + width > self.width:
+            raise IndexError(f"columns {x}..{x + width} are outside 0..{self.width}")
+        if y < self.row_start or y + height > self.row_stop:
+            raise IndexError(
+                f"rows {y}..{y + height} are outside "
+                f"{self.row_start}..{self.row_stop} of the converted region"
+            )
+        self._convert_columns(x, x + width)
+        rows = self._rows
+        start = (y - self.row_start) * self.width + x
+        stride = self.width
+        stop = start + height * stride
+        return b"".join(
+            [rows[offset : offset + width] for offset in range(start, stop, stride)]
+        )
+
+    def _convert_columns(self, x0, x1):
+        first = self._converted.find(0, x0, x1)
+        if first == -1:
+            return
+        if load_numpy() is not None:
+            # One vectorised pass over the whole row band beats several
+            # column-sized ones.
+            self._rows[:] = _convert_view(self._bgra)
+            self._converted[:] = b"\x01" * self.width
+            return
+        last = self._converted.rfind(0, x0, x1) + 1
+        span = last - first
+        stride = self.width * 4
+        bgra = self._bgra
+        gray = _convert_view(
+            b"".join(
+                [
+                    bgra[offset : offset + span * 4]
+                    for offset in range(first * 4, len(bgra), stride)
+                ]
+            )
+        )
+        target = first
+        for offset in range(0, len(gray), span):
+            self._rows[target : target + span] = gray[offset : offset + span]
+            target += self.width
+        self._converted[first:last] = b"\x01" * span
+
+
+class ResamplePlan:
+    """Box-filter resize from one source size to one target size, precomputed.
+
+    Each output pixel is the floored mean of the source pixels its box covers.
+    The source indices and divisors are worked out once, so resizing a slot is
+    a flat gather-and-sum with no per-pixel float math.
+    """
+
+    def __init__(self, source_width, source_height, target_width, target_height):
+        self.key = (source_width, source_height, target_width, target_height)
+        self._gathers = []
+        for target_y in range(target_height):
+            y0 = int(target_y * source_height / target_height)
+            y1 = max(y0 + 1, int((target_y + 1) * source_height / target_height))
+            for target_x in range(target_width):
+                x0 = int(target_x * source_width / target_width)
+                x1 = max(x0 + 1, int((target_x + 1) * source_width / target_width))
+                indices = [
+                    source_y * source_width + source_x
+                    for source_y in range(y0, min(y1, source_height))
+                    for source_x in range(x0, min(x1, source_width))
+                ]
+                if len(indices) == 1:
+                    # itemgetter with one index returns a bare value, not a
+                    # tuple; read the pixel twice and halve instead.
+                    indices *= 2
+                self._gathers.append((itemgetter(*indices), len(indices)))
+
+    def resize(self, pixels):
+        return bytes([sum(gather(pixels)) // count for gather, count in self._gathers])
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_png_rgb(path):
+    """Reads an 8-bit, non-interlaced RGB or RGBA PNG.
+
+    Returns ``(width, height, pixels)`` with three bytes per pixel; alpha is
+    dropped. Only what the glyph images in ``chars/`` need is supported.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError(f"{path} is not a PNG file")
+
+    offset = len(PNG_SIGNATURE)
+    header = None
+    compressed = bytearray()
+    while offset < len(data):
+        (length,) = struct.unpack(">I", data[offset : offset + 4])
+        chunk_type = data[offset + 4 : offset + 8]
+        chunk = data[offset + 8 : offset + 8 + length]
+        offset += 12 + length
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif chunk_type == b"IDAT":
+            compressed.extend(chunk)
+        elif chunk_type == b"IEND":
+            break
+    if header is None:
+        raise ValueError(f"{path} has no IHDR chunk")
+
+    width, height, bit_depth, color_type, _compression, _filter, interlace = header
+    channels = {2: 3, 6: 4}.get(color_type)
+    if bit_depth != 8 or channels is None or interlace:
+        raise ValueError(
+            f"{path}: unsupported PNG (bit depth {bit_depth}, color type "
+            f"{color_type}, interlace {interlace})"
+        )
+
+    raw = zlib.decompress(bytes(compressed))
+    stride = width * channels
+    previous = bytearray(stride)
+    pixels = bytearray()
+    for row in range(height):
+        start = row * (stride + 1)
+        line = bytearray(raw[start + 1 : start + 1 + stride])
+        _unfilter_png_row(raw[start], line, previous, channels)
+        if channels == 3:
+            pixels.extend(line)
+        else:
+            for x in range(0, stride, 4):
+                pixels.extend(line[x : x + 3])
+        previous = line
+    return width, height, bytes(pixels)
+
+
+def _unfilter_png_row(filter_type, line, previous, bpp):
+    for x in range(len(line)):
+        left = line[x - bpp] if x >= bpp else 0
+        up = previous[x]
+        if filter_type == 1:
+            line[x] = (line[x] + left) & 0xFF
+        elif filter_type == 2:
+            line[x] = (line[x] + up) & 0xFF
+        elif filter_type == 3:
+            line[x] = (line[x] + (left + up) // 2) & 0xFF
+        elif filter_type == 4:
+            up_left = previous[x - bpp] if x >= bpp else 0
+            estimate = left + up - up_left
+            distance_left = abs(estimate - left)
+            distance_up = abs(estimate - up)
+            distance_up_left = abs(estimate - up_left)
+            if distance_left <= distance_up and distance_left <= distance_up_left:
+                predictor = left
+            elif distance_up <= distance_up_left:
+                predictor = up
+            else:
+                predictor = up_left
+            line[x] = (line[x] + predictor) & 0xFF
+    return line
+
+
+def rgb_to_gray(pixels):
+    """Converts packed RGB bytes with the same weights as ``bgra_to_gray``."""
+    red = _RED_TABLE
+    green = _GREEN_TABLE
+    blue = _BLUE_TABLE
+    return bytes(
+        [
+            (red[r] + green[g] + blue[b]) // WEIGHT_DIVISOR
+            for r, g, b in zip(pixels[0::3], pixels[1::3], pixels[2::3])
+        ]
+    )
+
+
+def scale_bilinear(pixels, source_width, source_height, target_width, target_height):
+    """Resamples a one-byte-per-pixel image with centre-aligned bilinear filtering."""
+    x_ratio = source_width / target_width
+    y_ratio = source_height / target_height
+    result = bytearray(target_width * target_height)
+    for target_y in range(target_height):
+        source_y = min(max((target_y + 0.5) * y_ratio - 0.5, 0.0), source_height - 1)
+        y0 = int(source_y)
+        y1 = min(y0 + 1, source_height - 1)
+        fy = source_y - y0
+        for target_x in range(target_width):
+            source_x = min(max((target_x + 0.5) * x_ratio - 0.5, 0.0), source_width - 1)
+            x0 = int(source_x)
+            x1 = min(x0 + 1, source_width - 1)
+            fx = source_x - x0
+            top = pixels[y0 * source_width + x0] * (1 - fx) + pixels[
+                y0 * source_width + x1
+            ] * fx
+            bottom = pixels[y1 * source_width + x0] * (1 - fx) + pixels[
+                y1 * source_width + x1
+            ] * fx
+            value = top * (1 - fy) + bottom * fy
+            result[target_y * target_width + target_x] = int(value + 0.5)
+    return bytes(result)
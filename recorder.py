@@ -0,0 +1,220 @@
+"""Records OCR captures to a compact binary log and replays them through CSOCR.
+
+A log starts with a small file header followed by length-prefixed records.
+Each record holds the wall-clock time, the game time, the screen and capture
+sizes, the CS value read live and the raw BGRA capture. A record whose frame
+is identical to the previous one stores no pixels.
+
+Replay a log offline: python recorder.py LOG
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import time
+from typing import NamedTuple
+
+FILE_HEADER = struct.Struct("<4sH")
+FILE_MAGIC = b"CSFR"
+FILE_VERSION = 1
+
+LENGTH_PREFIX = struct.Struct("<I")
+# wall time, game time (NaN when unknown), screen width/height, capture
+# width/height, CS value read live (-1 when unknown).
+RECORD_HEADER = struct.Struct("<ddHHHHi")
+
+DEFAULT_FLUSH_RECORDS = 64
+
+
+class FrameRecord(NamedTuple):
+    timestamp: float
+    game_time: float
+    screen_width: int
+    screen_height: int
+    capture_width: int
+    capture_height: int
+    cs: int
+    frame: memoryview
+
+
+class FrameRecorder:
+    """Appends captures to a log, buffering ``flush_records`` of them per write.
+
+    A new log gets its file header right away, so even a session killed
+    before the first flush leaves a log ``FrameLog`` can open.
+    """
+
+    def __init__(self, path, flush_records=DEFAULT_FLUSH_RECORDS):
+        self.path = path
+        self.flush_records = max(1, flush_records)
+        self.records = 0
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._pending = 0
+        self._last_frame = None
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            header = FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION)
+            self._file.write(header)
+            self._file.flush()
+            self.bytes_written += len(header)
+
+    def record(self, geometry, frame, game_time=None, cs=None):
+        size = geometry.capture_width * geometry.capture_height * 4
+        pixels = bytes(memoryview(frame).cast("B")[:size])
+        if pixels == self._last_frame:
+            stored = b""
+        else:
+            stored = self._last_frame = pixels
+        header = RECORD_HEADER.pack(
+            time.time(),
+            math.nan if game_time is None else game_time,
+            geometry.screen_width,
+            geometry.screen_height,
+            geometry.capture_width,
+            geometry.capture_height,
+            -1 if cs is None else cs,
+        )
+        self._buffer += LENGTH_PREFIX.pack(len(header) + len(stored))
+        self._buffer += header
+        self._buffer += stored
+        self.records += 1
+        self._pending += 1
+        if self._pending >= self.flush_records:
+            self.flush()
+
+    def flush(self):
+        if self._file is None or not self._buffer:
+            return
+        self._file.write(self._buffer)
+        self._file.flush()
+        self.bytes_written += len(self._buffer)
+        self._buffer.clear()
+        self._pending = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FrameLog:
+    """Memory-maps a recorded log and iterates over its records.
+
+    Frames are views into the mapping; copy them if they must outlive the
+    ``FrameLog``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < FILE_HEADER.size:
+                raise ValueError(f"{path} is too short to be a frame log")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version = FILE_HEADER.unpack_from(self._view)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FILE_VERSION} frame log")
+
+    def __iter__(self):
+        view = self._view
+        offset = FILE_HEADER.size
+        previous = None
+        while offset + LENGTH_PREFIX.size <= len(view):
+            (length,) = LENGTH_PREFIX.unpack_from(view, offset)
+            offset += LENGTH_PREFIX.size
+            if offset + length > len(view):
+                # The recorder was killed mid-write; drop the partial record.
+                break
+            fields = RECORD_HEADER.unpack_from(view, offset)
+            frame = view[offset + RECORD_HEADER.size : offset + length]
+            offset += length
+            if not len(frame):
+                frame = previous
+            if frame is None:
+                # A repeat of a frame from before an append; nothing to show.
+                continue
+            previous = frame
+            yield FrameRecord(*fields, frame)
+
+    def close(self):
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Frames handed out are still referenced; the mapping is
+            # released along with the last of them.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def replay(log, ocr):
+    """Feeds every record of ``log`` through ``ocr`` and yields the readings.
+
+    ``ocr`` is a ``CSOCR``; its frame source and screen size are taken over
+    for the duration of the replay.
+    """
+    current = [None]
+    ocr.frame_source = lambda geometry: current[0].frame
+    for record in log:
+        screen_size = (record.screen_width, record.screen_height)
+        if screen_size != ocr.screen_size:
+            ocr.screen_size = screen_size
+            ocr.invalidate_geometry()
+        current[0] = record
+        yield record, ocr.get_cs()
+
+
+def main():
+    from Stats import CSOCR
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log")
+    parser.add_argument("--show", type=int, default=20, help="mismatches to list")
+    args = parser.parse_args()
+
+    ocr = CSOCR()
+    frames = 0
+    mismatches = []
+    try:
+        log = FrameLog(args.log)
+    except ValueError as exc:
+        raise SystemExit(exc)
+    with log:
+        start = time.perf_counter()
+        for record, reading in replay(log, ocr):
+            frames += 1
+            if record.cs >= 0 and reading != record.cs:
+                mismatches.append((frames - 1, record.cs, reading, record.game_time))
+        elapsed = time.perf_counter() - start
+
+    if not frames:
+        print("no frames")
+        return
+    print(
+        f"{frames} frames in {elapsed:.3f}s ({frames / elapsed:.0f} frames/s), "
+        f"{len(mismatches)} differ from the live reading"
+    )
+    for index, live, reading, game_time in mismatches[: args.show]:
+        print(f"  frame {index}: live={live} replay={reading} game_time={game_time:.2f}")
+    print(" ".join(f"{key}={value}" for key, value in ocr.stats().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+import logging
+import math
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from operator import mul, sub
+
+from imaging import load_numpy, read_png_rgb, rgb_to_gray, scale_bilinear
+
+
+logger = logging.getLogger("cs_overlay")
+
+BLANK_TEMPLATE = 10
+DEFAULT_GLYPH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chars")
+
+# magic, format version, template count, width, height, CRC32 of the source
+# templates the bank was scaled from.
+NATIVE_BANK_HEADER = struct.Struct("<4sHHHHI")
+NATIVE_BANK_MAGIC = b"CSTB"
+NATIVE_BANK_VERSION = 1
+
+# Pixels with the most spread across templates that the cascade compares
+# directly before any full sum of squared differences.
+CASCADE_PROBE_PIXELS = 12
+
+# Luma at or above which a pixel counts as lit for binarized matching; the
+# HUD digits are near-white on a near-black background.
+BINARY_THRESHOLD = 128
+# Maps each luma value to the ASCII digit of its bit, so ``int(..., 2)`` packs
+# a whole slot in one call.
+_BIT_CHARS = bytes(0x31 if value >= BINARY_THRESHOLD else 0x30 for value in range(256))
+# Bits the binary winner must lead the runner-up by to be taken without an
+# SSD check. Resampled digits at non-integer scales put whole edge columns
+# either side of the threshold, so close calls are settled by ``match``.
+BINARY_MARGIN_BITS = 4
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:
+
+    def _popcount(value):
+        return bin(value).count("1")
+
+# Squares indexed by a pixel difference in -255..255; negative differences
+# wrap around to the end of the list.
+_SQUARES = [value * value for value in range(256)] + [
+    (511 - value) ** 2 for value in range(256, 511)
+]
+
+
+class TemplateBank:
+    """Digit templates packed into one contiguous byte string.
+
+    ``match`` compares integer sums of squared differences one template row at
+    a time and abandons a template as soon as its partial sum is worse than the
+    best full sum found so far.
+    """
+
+    def __init__(self, templates, row_length):
+        templates = [bytes(template) for template in templates]
+        if not templates:
+            raise ValueError("TemplateBank needs at least one template")
+        size = len(templates[0])
+        if any(len(template) != size for template in templates):
+            raise ValueError("All templates must have the same number of pixels")
+        if size % row_length:
+            raise ValueError(
+                f"Template size {size} is not a multiple of the row length {row_length}"
+            )
+        self.count = len(templates)
+        self.size = size
+        self.row_length = row_length
+        self.height = size // row_length
+        self.data = b"".join(templates)
+        self._row_bounds = [
+            (offset, offset + row_length) for offset in range(0, size, row_length)
+        ]
+        self._rows = [
+            [self.data[base + start : base + stop] for start, stop in self._row_bounds]
+            for base in range(0, len(self.data), size)
+        ]
+        self._matrix = None
+        self._norms = None
+        self._confident_ssd = None
+        self._build_cascade_features(templates)
+        self.cascade_slots = 0
+        self.cascade_exact = 0
+        self._bit_masks = [binarize(template) for template in templates]
+        self.binary_fallbacks = 0
+
+    def _build_cascade_features(self, templates):
+        size = self.size
+        width = self.row_length
+        self._sums = [sum(template) for template in templates]
+        self._centered_norms = [
+            math.sqrt(max(0, sum(map(mul, template, template)) - total * total / size))
+            for template, total in zip(templates, self._sums)
+        ]
+        self._row_sums = [
+            [sum(template[start:stop]) for start, stop in self._row_bounds]
+            for template in templates
+        ]
+        self._column_sums = [
+            [sum(template[column::width]) for column in range(width)]
+            for template in templates
+        ]
+
+        def spread(pixel):
+            values = [template[pixel] for template in templates]
+            mean = sum(values) / len(values)
+            return sum((value - mean) ** 2 for value in values)
+
+        # For each probe pixel, the squared difference to every template for
+        # each of the 256 values the slot pixel can take.
+        self._probes = sorted(range(size), key=spread, reverse=True)[
+            :CASCADE_PROBE_PIXELS
+        ]
+        self._probe_tables = [
+            [tuple((template[pixel] - value) ** 2 for template in templates) for value in range(256)]
+            for pixel in self._probes
+        ]
+
+    def __len__(self):
+        return self.count
+
+    def template(self, index):
+        return self.data[index * self.size : (index + 1) * self.size]
+
+    @property
+    def confident_ssd(self):
+        """Largest SSD to a template that guarantees ``match`` picks it.
+
+        A slot closer than half the smallest distance between two templates
+        cannot be closer to any other template, so it is at most a quarter of
+        the smallest squared distance.
+        """
+        if self._confident_ssd is None:
+            separation = min(
+                (
+                    self.ssd(self.template(a), b)
+                    for a in range(self.count)
+                    for b in range(a + 1, self.count)
+                ),
+                default=0,
+            )
+            self._confident_ssd = (separation - 1) // 4
+        return self._confident_ssd
+
+    def ssd(self, pixels, index, limit=None):
+        """Sum of squared differences to one template.
+
+        Returns ``None`` as soon as the partial sum exceeds ``limit``.
+        """
+        if len(pixels) != self.size:
+            raise ValueError(f"Expected {self.size} pixels, got {len(pixels)}")
+        square = _SQUARES.__getitem__
+        total = 0
+        for (start, stop), template_row in zip(self._row_bounds, self._rows[index]):
+            total += sum(map(square, map(sub, template_row, pixels[start:stop])))
+            if limit is not None and total > limit:
+                return None
+        return total
+
+    def match(self, pixels, hint=None):
+        """Returns ``(index, ssd)`` for the closest template.
+
+        ``hint`` is the template expected to win; checking it first lets the
+        others be abandoned sooner. Ties go to the lowest index, like a plain
+        left-to-right scan.
+        """
+        if len(pixels) != self.size:
+            raise ValueError(f"Expected {self.size} pixels, got {len(pixels)}")
+        rows = [pixels[start:stop] for start, stop in self._row_bounds]
+        if hint is None or not 0 <= hint < self.count:
+            order = range(self.count)
+        else:
+            order = [hint, *range(hint), *range(hint + 1, self.count)]
+
+        square = _SQUARES.__getitem__
+        best_index = 0
+        best_ssd = None
+        for index in order:
+            ssd = 0
+            for template_row, row in zip(self._rows[index], rows):
+                ssd += sum(map(square, map(sub, template_row, row)))
+                if best_ssd is not None and ssd > best_ssd:
+                    break
+            else:
+                if best_ssd is None or ssd < best_ssd or index < best_index:
+                    best_ssd = ssd
+                    best_index = index
+        return best_index, best_ssd
+
+    def lower_bounds(self, pixels):
+        """First cascade stage: a lower bound on the SSD to every template.
+
+        Per template this is the larger of the exact partial SSD over the
+        most discriminative pixels and the mean/variance split of the SSD.
+        The latter is what rules a flat slot in or out against the
+        near-uniform blank template 10 without touching its pixels.
+        """
+        if len(pixels) != self.size:
+            raise ValueError(f"Expected {self.size} pixels, got {len(pixels)}")
+        size = self.size
+        total = sum(pixels)
+        centered_norm = math.sqrt(
+            max(0, sum(map(mul, pixels, pixels)) - total * total / size)
+        )
+        probe_bounds = map(
+            sum,
+            zip(
+                *[
+                    table[pixels[pixel]]
+                    for pixel, table in zip(self._probes, self._probe_tables)
+                ]
+            ),
+        )
+        bounds = []
+        for probe_bound, template_sum, template_norm in zip(
+            probe_bounds, self._sums, self._centered_norms
+        ):
+            mean_diff = total - template_sum
+            spread_diff = centered_norm - template_norm
+            # Floats only enter here; shave a little off so rounding can never
+            # lift the bound past the exact integer SSD.
+            variance_bound = int(
+                (spread_diff * spread_diff + mean_diff * mean_diff / size)
+                * (1 - 1e-9)
+            )
+            bounds.append(max(probe_bound, variance_bound))
+        return bounds
+
+    def _projection_bound(self, index, row_sums, column_sums):
+        """Second cascade stage: SSD lower bound from row and column sums.
+
+        By Cauchy-Schwarz a group of ``n`` pixels whose sums differ by ``d``
+        contributes at least ``d * d / n`` to the SSD.
+        """
+        diffs = list(map(sub, row_sums, self._row_sums[index]))
+        row_bound = sum(map(mul, diffs, diffs)) // self.row_length
+        diffs = list(map(sub, column_sums, self._column_sums[index]))
+        column_bound = sum(map(mul, diffs, diffs)) // self.height
+        return max(row_bound, column_bound)
+
+    def match_cascade(self, pixels, hint=None):
+        """Same result as ``match``, running the full SSD on few templates.
+
+        Templates are visited in order of their ``lower_bounds``. One whose
+        bound already exceeds the best exact SSD cannot win and, as the
+        bounds are sorted, neither can any after it; the rest must also get
+        past ``_projection_bound`` before their full SSD is computed.
+        ``hint`` is compared first, as in ``match``, so a correct hint
+        leaves the tightest bound to prune with.
+        """
+        bounds = self.lower_bounds(pixels)
+        order = sorted(range(self.count), key=bounds.__getitem__)
+        if hint is not None and 0 <= hint < self.count:
+            order.remove(hint)
+            order.insert(0, hint)
+        rows = [pixels[start:stop] for start, stop in self._row_bounds]
+        row_sums = None
+        column_sums = None
+        square = _SQUARES.__getitem__
+        best_index = 0
+        best_ssd = None
+        exact = 0
+        for index in order:
+            if best_ssd is not None:
+                bound = bounds[index]
+                if bound > best_ssd:
+                    break
+                if bound == best_ssd and index > best_index:
+                    continue
+                if row_sums is None:
+                    row_sums = list(map(sum, rows))
+                    width = self.row_length
+                    column_sums = [sum(pixels[column::width]) for column in range(width)]
+                bound = self._projection_bound(index, row_sums, column_sums)
+                if bound > best_ssd or (bound == best_ssd and index > best_index):
+                    continue
+            exact += 1
+            ssd = 0
+            for template_row, row in zip(self._rows[index], rows):
+                ssd += sum(map(square, map(sub, template_row, row)))
+                if best_ssd is not None and ssd > best_ssd:
+                    break
+            else:
+                if best_ssd is None or ssd < best_ssd or index < best_index:
+                    best_ssd = ssd
+                    best_index = index
+        self.cascade_slots += 1
+        self.cascade_exact += exact
+        return best_index, best_ssd
+
+    def match_binary(self, pixels, hint=None):
+        """Returns ``(index, ssd)`` for the template with the fewest differing bits.
+
+        The slot is thresholded into one int and compared against every
+        pre-binarized template with XOR and a popcount. Unless the winner
+        leads the runner-up by more than ``BINARY_MARGIN_BITS`` the slot goes
+        to ``match`` with ``hint``; otherwise only the winner's SSD is
+        computed.
+        """
+        if len(pixels) != self.size:
+            raise ValueError(f"Expected {self.size} pixels, got {len(pixels)}")
+        bits = binarize(pixels)
+        distances = [_popcount(bits ^ mask) for mask in self._bit_masks]
+        nearest, runner_up = sorted(distances)[:2]
+        if runner_up - nearest <= BINARY_MARGIN_BITS:
+            self.binary_fallbacks += 1
+            return self.match(pixels, hint)
+        index = distances.index(nearest)
+        return index, self.ssd(pixels, index)
+
+    def match_batch(self, slots):
+        """Scores many slots at once and returns ``(index, ssd)`` for each.
+
+        With NumPy every slot is scored against every template in one matrix
+        product using ``|a|^2 - 2 a.b + |b|^2`` and the precomputed template
+        norms. Without it each slot goes through ``match``.
+        """
+        if not slots:
+            return []
+        np = load_numpy()
+        if np is None:
+            return [self.match(slot) for slot in slots]
+        if self._matrix is None:
+            self._matrix = (
+                np.frombuffer(self.data, dtype=np.uint8)
+                .reshape(self.count, self.size)
+                .astype(np.int64)
+            )
+            self._norms = (self._matrix * self._matrix).sum(axis=1)
+        for slot in slots:
+            if len(slot) != self.size:
+                raise ValueError(f"Expected {self.size} pixels, got {len(slot)}")
+        pixels = (
+            np.frombuffer(b"".join(bytes(slot) for slot in slots), dtype=np.uint8)
+            .reshape(len(slots), self.size)
+            .astype(np.int64)
+        )
+        ssd = (
+            (pixels * pixels).sum(axis=1)[:, None]
+            - 2 * (pixels @ self._matrix.T)
+            + self._norms[None, :]
+        )
+        indices = ssd.argmin(axis=1)
+        best = ssd[np.arange(len(slots)), indices]
+        return [(int(index), int(value)) for index, value in zip(indices, best)]
+
+
+def binarize(pixels):
+    """Packs luma pixels into an int, one bit per pixel, first pixel highest."""
+    return int(bytes(pixels).translate(_BIT_CHARS), 2)
+
+
+class GlyphCache:
+    """Bounded LRU mapping exact slot pixel bytes to a previous match."""
+
+    def __init__(self, maxsize):
+        self.maxsize = max(0, int(maxsize))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+def load_glyph_templates(glyph_dir, count, width, height):
+    """Reads ``0c.png`` .. ``{count - 1}c.png`` from ``glyph_dir`` as luma bytes.
+
+    Returns ``None`` when any glyph is missing, unreadable or the wrong size,
+    so callers can fall back to ``TARGET_DIGITS``.
+    """
+    templates = []
+    for index in range(count):
+        path = os.path.join(glyph_dir, f"{index}c.png")
+        try:
+            glyph_width, glyph_height, pixels = read_png_rgb(path)
+        except (OSError, ValueError, zlib.error) as exc:
+            logger.warning("Glyph %s unavailable: %s", path, exc)
+            return None
+        if (glyph_width, glyph_height) != (width, height):
+            logger.warning(
+                "Glyph %s is %sx%s, expected %sx%s",
+                path,
+                glyph_width,
+                glyph_height,
+                width,
+                height,
+            )
+            return None
+        templates.append(rgb_to_gray(pixels))
+    return templates
+
+
+def native_bank_path(cache_dir, width, height):
+    return os.path.join(cache_dir, f"templates_{width}x{height}.bin")
+
+
+def build_native_bank(
+    templates, source_width, target_width, target_height, cache_dir=None
+):
+    """Returns a ``TemplateBank`` of ``templates`` scaled to the target size.
+
+    Scaled banks are written to ``cache_dir`` and reused on the next start as
+    long as the source templates have not changed.
+    """
+    templates = [bytes(template) for template in templates]
+    source_height = len(templates[0]) // source_width
+    if (target_width, target_height) == (source_width, source_height):
+        return TemplateBank(templates, source_width)
+
+    source_crc = zlib.crc32(b"".join(templates))
+    path = None
+    if cache_dir:
+        path = native_bank_path(cache_dir, target_width, target_height)
+        bank = _load_native_bank(
+            path, len(templates), target_width, target_height, source_crc
+        )
+        if bank is not None:
+            return bank
+
+    scaled = [
+        scale_bilinear(
+            template, source_width, source_height, target_width, target_height
+        )
+        for template in templates
+    ]
+    bank = TemplateBank(scaled, target_width)
+    if path:
+        _save_native_bank(path, bank, target_height, source_crc)
+    return bank
+
+
+def _load_native_bank(path, count, width, height, source_crc):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning("Template bank %s unreadable: %s", path, exc)
+        return None
+    expected = (
+        NATIVE_BANK_MAGIC,
+        NATIVE_BANK_VERSION,
+        count,
+        width,
+        height,
+        source_crc,
+    )
+    size = NATIVE_BANK_HEADER.size
+    if (
+        len(data) != size + count * width * height
+        or NATIVE_BANK_HEADER.unpack_from(data) != expected
+    ):
+        logger.info("Template bank %s is stale, rebuilding", path)
+        return None
+    body = data[size:]
+    step = width * height
+    return TemplateBank([body[i : i + step] for i in range(0, len(body), step)], width)
+
+
+def _save_native_bank(path, bank, height, source_crc):
+    header = NATIVE_BANK_HEADER.pack(
+        NATIVE_BANK_MAGIC,
+        NATIVE_BANK_VERSION,
+        bank.count,
+        bank.row_length,
+        height,
+        source_crc,
+    )
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(header + bank.data)
+        os.replace(temp_path, path)
+    except OSError as exc:
+        logger.warning("Could not cache template bank %s: %s", path, exc)
@@ -0,0 +1,24 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Stats import CSOCR  # noqa: E402
+from win32 import IS_WINDOWS  # noqa: E402
+
+
+@unittest.skipIf(IS_WINDOWS, "needs the stub backend, where every GDI call fails")
+class CaptureFailureTest(unittest.TestCase):
+    def test_failed_surface_keeps_previous_reading(self):
+        ocr = CSOCR(screen_size=(1920, 1080))
+        ocr.prev = 42
+        with self.assertLogs("cs_overlay", "WARNING") as logs:
+            readings = [ocr.get_cs() for _ in range(3)]
+        self.assertEqual(readings, [42, 42, 42])
+        self.assertEqual(ocr.stats()["capture_failures"], 3)
+        self.assertEqual(len(logs.records), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gameclock import (  # noqa: E402
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    RECHECK_INTERVAL,
+    STATUS_FAILED,
+    STATUS_RUNNING,
+    CircuitBreaker,
+    ClockPoller,
+    GameClock,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=3, base_delay=2.0, max_delay=8.0, clock=self.clock
+        )
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        for _ in range(2):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BREAKER_CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, BREAKER_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_in(), 2.0)
+
+    def test_half_open_probe_closes_on_success(self):
+        self.open_breaker()
+        self.clock.time += 2.0
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, BREAKER_HALF_OPEN)
+        # One probe at a time.
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, BREAKER_CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_probe_reopens_with_doubled_delay(self):
+        self.open_breaker()
+        for delay in (4.0, 8.0, 8.0):
+            self.clock.time += self.breaker.retry_in()
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+            self.assertEqual(self.breaker.state, BREAKER_OPEN)
+            self.assertEqual(self.breaker.retry_in(), delay)
+
+
+class GameClockBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.results = []
+        self.calls = 0
+        self.game_clock = GameClock(self.fetch, clock=self.clock)
+
+    def fetch(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def test_probe_that_raises_reopens_breaker(self):
+        self.results = [None, None, None, OSError("probe"), 60.0]
+        for _ in range(3):
+            self.clock.time += self.game_clock.poll()
+        breaker = self.game_clock.breaker
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+
+        # The probe raises: the breaker opens again and the poller is told
+        # to wait instead of spinning.
+        delay = self.game_clock.poll()
+        self.assertEqual(self.calls, 4)
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+        self.assertGreater(delay, 0)
+        self.assertEqual(self.game_clock.snapshot.status, STATUS_FAILED)
+        self.assertEqual(self.game_clock.failures, 4)
+
+        self.clock.time += delay
+        self.game_clock.poll()
+        self.assertEqual(self.calls, 5)
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+        self.assertEqual(self.game_clock.snapshot.status, STATUS_RUNNING)
+        self.assertEqual(self.game_clock.read(), 60.0)
+
+    def test_rejected_poll_waits_while_probe_in_flight(self):
+        breaker = self.game_clock.breaker
+        breaker.state = BREAKER_HALF_OPEN
+        breaker.probing = True
+        self.assertEqual(self.game_clock.poll(), RECHECK_INTERVAL)
+        self.assertEqual(self.calls, 0)
+
+
+class ClockPollerTest(unittest.TestCase):
+    def test_on_stop_runs_on_worker_after_request_in_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+        events = []
+
+        def fetch():
+            started.set()
+            release.wait(5)
+            events.append("fetched")
+            return 60.0
+
+        def on_stop():
+            events.append(("stopped", threading.current_thread().name))
+
+        poller = ClockPoller(GameClock(fetch), on_stop=on_stop)
+        poller.start()
+        poller.set_active(True)
+        self.assertTrue(started.wait(5))
+        release.set()
+        poller.stop(timeout=5)
+        self.assertEqual(events, ["fetched", ("stopped", "game-clock")])
+
+
+if __name__ == "__main__":
+    unittest.main()
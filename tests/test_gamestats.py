@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gameclock import BREAKER_OPEN, STATUS_FAILED, GameClock  # noqa: E402
+from Stats import parse_game_time  # noqa: E402
+
+PAYLOADS = os.path.join(ROOT, "bench", "payloads")
+
+
+def read_payload(name):
+    with open(os.path.join(PAYLOADS, name), "rb") as f:
+        return f.read()
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+class ParseGameTimeTest(unittest.TestCase):
+    def test_gamestats_payloads(self):
+        for name, expected in (
+            ("aram.json", 611.5042114257812),
+            ("classic-early.json", 92.41731262207031),
+            ("classic-indented.json", 1203.3302001953125),
+            ("classic-late.json", 1874.0260009765625),
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(parse_game_time(read_payload(name)), expected)
+
+    def test_reads_only_length_bytes(self):
+        data = bytearray(read_payload("aram.json"))
+        length = len(data)
+        data.extend(b"\0" * 64)
+        self.assertEqual(parse_game_time(data, length), 611.5042114257812)
+
+    def test_no_active_game(self):
+        self.assertIsNone(parse_game_time(read_payload("no-game.json")))
+
+    def test_no_active_game_fails_sync_and_opens_breaker(self):
+        payload = read_payload("no-game.json")
+        clock = FakeClock()
+        game_clock = GameClock(lambda: parse_game_time(payload), clock=clock)
+        for _ in range(3):
+            clock.time += game_clock.poll()
+        self.assertEqual(game_clock.snapshot.status, STATUS_FAILED)
+        self.assertEqual(game_clock.failures, 3)
+        self.assertEqual(game_clock.breaker.state, BREAKER_OPEN)
+        self.assertIsNone(game_clock.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
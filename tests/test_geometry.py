@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry import CaptureGeometry, compute_capture_geometry  # noqa: E402
+
+# Worked out by hand from the 1080p base values: each one is scaled by
+# height / 1080 and rounded, left_padding is 1 above 1080p, and scaled
+# captures are 2 columns wider for the offset retries.
+EXPECTED = {
+    (1280, 720): dict(
+        scale=2 / 3,
+        left=1280 - 92,
+        top=4,
+        right=1280 - 72,
+        bottom=17,
+        left_padding=0,
+        digit_top=2,
+        digit_width=7,
+        digit_height=8,
+        first_digit_spacing=6,
+        digit_spacing=7,
+        capture_width=20,
+        capture_height=13,
+    ),
+    (1920, 1080): dict(
+        scale=1.0,
+        left=1920 - 138,
+        top=6,
+        right=1920 - 108,
+        bottom=25,
+        left_padding=0,
+        digit_top=3,
+        digit_width=10,
+        digit_height=12,
+        first_digit_spacing=9,
+        digit_spacing=10,
+        capture_width=30,
+        capture_height=19,
+    ),
+    (2560, 1440): dict(
+        scale=4 / 3,
+        left=2560 - 184 - 1,
+        top=8,
+        right=2560 - 144,
+        bottom=33,
+        left_padding=1,
+        digit_top=4,
+        digit_width=13,
+        digit_height=16,
+        first_digit_spacing=12,
+        digit_spacing=13,
+        capture_width=41 + 2,
+        capture_height=25,
+    ),
+    (3840, 2160): dict(
+        scale=2.0,
+        left=3840 - 276 - 1,
+        top=12,
+        right=3840 - 216,
+        bottom=50,
+        left_padding=1,
+        digit_top=6,
+        digit_width=20,
+        digit_height=24,
+        first_digit_spacing=18,
+        digit_spacing=20,
+        capture_width=61 + 2,
+        capture_height=38,
+    ),
+    (3440, 1440): dict(
+        scale=4 / 3,
+        left=3440 - 184 - 1,
+        top=8,
+        right=3440 - 144,
+        bottom=33,
+        left_padding=1,
+        digit_top=4,
+        digit_width=13,
+        digit_height=16,
+        first_digit_spacing=12,
+        digit_spacing=13,
+        capture_width=41 + 2,
+        capture_height=25,
+    ),
+}
+
+
+class ComputeCaptureGeometryTest(unittest.TestCase):
+    def test_resolutions(self):
+        for (width, height), fields in EXPECTED.items():
+            with self.subTest(resolution=f"{width}x{height}"):
+                expected = CaptureGeometry(
+                    screen_width=width, screen_height=height, **fields
+                )
+                self.assertEqual(compute_capture_geometry(width, height), expected)
+
+    def test_capture_fits_on_screen(self):
+        for width, height in EXPECTED:
+            with self.subTest(resolution=f"{width}x{height}"):
+                geometry = compute_capture_geometry(width, height)
+                self.assertGreaterEqual(geometry.left, 0)
+                self.assertLessEqual(
+                    geometry.left + geometry.capture_width, geometry.screen_width
+                )
+                self.assertLessEqual(
+                    geometry.digit_top + geometry.digit_height,
+                    geometry.capture_height,
+                )
+
+    def test_zero_height_falls_back_to_base_scale(self):
+        self.assertEqual(compute_capture_geometry(1920, 0).scale, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry import compute_capture_geometry  # noqa: E402
+from recorder import FILE_HEADER, FrameLog, FrameRecorder  # noqa: E402
+
+
+class FrameLogTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csfr")
+        os.close(handle)
+        os.remove(self.path)
+        self.geometry = compute_capture_geometry(1920, 1080)
+        size = self.geometry.capture_width * self.geometry.capture_height * 4
+        self.frames = [bytes([value]) * size for value in (10, 10, 200)]
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_header_written_before_first_flush(self):
+        recorder = FrameRecorder(self.path, flush_records=64)
+        recorder.record(self.geometry, self.frames[0], 12.5, 3)
+        # Killed here: nothing but the header reached the file.
+        self.assertEqual(os.path.getsize(self.path), FILE_HEADER.size)
+        with FrameLog(self.path) as log:
+            self.assertEqual(list(log), [])
+        recorder.close()
+
+    def test_round_trip(self):
+        with FrameRecorder(self.path, flush_records=2) as recorder:
+            for index, frame in enumerate(self.frames):
+                recorder.record(self.geometry, frame, game_time=index * 0.5, cs=index)
+            recorder.record(self.geometry, self.frames[2])
+        with FrameLog(self.path) as log:
+            records = [(r.game_time, r.cs, bytes(r.frame)) for r in log]
+        self.assertEqual(
+            records[:3],
+            [(index * 0.5, index, frame) for index, frame in enumerate(self.frames)],
+        )
+        game_time, cs, frame = records[3]
+        self.assertNotEqual(game_time, game_time)  # NaN for unknown
+        self.assertEqual((cs, frame), (-1, self.frames[2]))
+
+    def test_rejects_empty_and_short_files(self):
+        for content in (b"", b"CS"):
+            with self.subTest(content=content):
+                with open(self.path, "wb") as f:
+                    f.write(content)
+                with self.assertRaises(ValueError):
+                    FrameLog(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""Win32 DLL functions that are declared up front and bound on first call.
+
+Prototypes are declared on the shared library objects below exactly as on
+``ctypes.windll`` (``user32.GetDC.argtypes = [...]``). Declaring records the
+prototype without loading the DLL or looking the function up; the first call
+resolves it, applies the prototype and swaps the real function in for later
+lookups. Without ``ctypes.windll`` the same declarations work against a stub
+backend where every call fails by returning 0, so modules built on this
+import anywhere.
+"""
+
+import ctypes
+
+IS_WINDOWS = hasattr(ctypes, "windll")
+
+# Callbacks are stdcall on Windows; elsewhere only the type needs to exist.
+WINFUNCTYPE = getattr(ctypes, "WINFUNCTYPE", ctypes.CFUNCTYPE)
+
+_UNSET = object()
+
+
+class LazyFunction:
+    """A declared DLL function that resolves itself on first call."""
+
+    def __init__(self, library, name):
+        self.library = library
+        self.__name__ = name
+        self.argtypes = None
+        self.restype = _UNSET
+        self.errcheck = None
+        self.function = None
+
+    def __call__(self, *args):
+        function = self.function
+        if function is None:
+            function = self.bind()
+        return function(*args)
+
+    def bind(self):
+        if self.function is None:
+            self.function = function = self.library.resolve(self.__name__)
+            if self.argtypes is not None:
+                function.argtypes = self.argtypes
+            if self.restype is not _UNSET:
+                function.restype = self.restype
+            if self.errcheck is not None:
+                function.errcheck = self.errcheck
+            # Later attribute lookups skip this wrapper entirely.
+            setattr(self.library, self.__name__, function)
+        return self.function
+
+
+class LazyLibrary:
+    """Hands out ``LazyFunction`` declarations for one DLL, loading it on demand."""
+
+    def __init__(self, name):
+        self._name = name
+        self._dll = None
+        self._declared = {}
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        function = LazyFunction(self, name)
+        self._declared[name] = function
+        setattr(self, name, function)
+        return function
+
+    def resolve(self, name):
+        if self._dll is None:
+            if IS_WINDOWS:
+                self._dll = getattr(ctypes.windll, self._name)
+            else:
+                self._dll = _Stub(self._name)
+        return getattr(self._dll, name)
+
+    def bind_all(self):
+        """Binds every declared function now, as an eager import used to."""
+        for function in list(self._declared.values()):
+            function.bind()
+
+    @property
+    def declared(self):
+        return len(self._declared)
+
+
+class _StubFunction:
+    def __init__(self, name):
+        self.__name__ = name
+        self.argtypes = None
+        self.restype = None
+        self.errcheck = None
+
+    def __call__(self, *args):
+        return 0
+
+
+class _Stub:
+    """Backend used off Windows; every function returns 0, as a failed call."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        return _StubFunction(f"{self._name}.{name}")
+
+
+_libraries = {}
+
+
+def last_error():
+    """``ctypes.WinError()`` for the calling thread's last error.
+
+    Off Windows there is no ``WinError``; the stub backend's failures come
+    back as a plain ``OSError``.
+    """
+    if IS_WINDOWS:
+        return ctypes.WinError()
+    return OSError("Win32 call failed (stub backend)")
+
+
+def library(name):
+    """The shared lazy handle for ``name``, like ``ctypes.windll.<name>``."""
+    if name not in _libraries:
+        _libraries[name] = LazyLibrary(name)
+    return _libraries[name]
+
+
+def bind_all():
+    for lazy_library in list(_libraries.values()):
+        lazy_library.bind_all()
+
+
+user32 = library("user32")
+gdi32 = library("gdi32")
+kernel32 = library("kernel32")
+shell32 = library("shell32")
+winhttp = library("winhttp")